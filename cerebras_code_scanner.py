@@ -3,14 +3,26 @@ import os
 import sys
 import json
 import yaml
-import glob
+import hashlib
+import ast
+import re
+import functools
+import sqlite3
+import threading
 import fnmatch
 import logging
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import dotenv
 import requests
 from huggingface_hub import InferenceClient
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
@@ -18,11 +30,202 @@ dotenv.load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Files with fewer non-whitespace characters than this are not worth an API call
+MIN_SCAN_SIZE = 32
+
+# Number of files analyzed concurrently during a directory scan
+DEFAULT_MAX_WORKERS = 8
+
+# Model used for all analysis requests
+MODEL_NAME = "meta-llama/Llama-3.3-70B-Instruct"
+
+# Fixed preamble sent ahead of every prompt; kept byte-identical so providers can reuse the cached prefix
+SYSTEM_PROMPT = "You are an expert code analyzer specializing in security, performance, and code quality."
+
+# Default location of the on-disk API response cache
+DEFAULT_CACHE_FILE = '.scan_cache.sqlite'
+
+# Number of threads reading files ahead of the analysis during a directory scan
+DEFAULT_READ_WORKERS = 8
+# Maximum number of files read ahead of the analysis
+READ_AHEAD = 64
+
+# Python files up to this many lines are pre-screened with static rules before calling the API
+PREFILTER_MAX_LINES = 500
+
+# Imports that make a Python file worth a security analysis
+_SECURITY_MODULES = frozenset({
+    'subprocess', 'os', 'sys', 'shutil', 'pickle', 'cPickle', 'marshal', 'shelve', 'dill',
+    'yaml', 'hashlib', 'hmac', 'random', 'secrets', 'crypt', 'Crypto', 'cryptography', 'ssl',
+    'socket', 'requests', 'urllib', 'urllib3', 'http', 'httpx', 'aiohttp', 'ftplib', 'telnetlib',
+    'smtplib', 'xml', 'lxml', 'sqlite3', 'psycopg2', 'pymysql', 'MySQLdb', 'mysql', 'sqlalchemy',
+    'jwt', 'flask', 'django', 'fastapi', 'jinja2', 'tempfile', 'ctypes', 'logging', 'paramiko',
+})
+# Builtins that make a Python file worth a security analysis
+_SECURITY_CALLS = frozenset({'eval', 'exec', 'compile', '__import__', 'input', 'open', 'getattr', 'setattr'})
+# Database modules whose use makes a Python file worth a performance analysis
+_DATABASE_MODULES = frozenset({'sqlite3', 'psycopg2', 'pymysql', 'MySQLdb', 'mysql', 'sqlalchemy', 'pymongo', 'redis'})
+_SQL_KEYWORD_PATTERN = r'\b(?:SELECT|INSERT|UPDATE|DELETE|DROP|CREATE|ALTER)\b'
+_SECRET_NAME_PATTERN = r'pass(?:wd|word)?|secret|token|api_?key|credential|private_?key'
+_SQL_KEYWORD_RE = re.compile(_SQL_KEYWORD_PATTERN, re.IGNORECASE)
+_SECRET_NAME_RE = re.compile(_SECRET_NAME_PATTERN, re.IGNORECASE)
+
+def _word_alternation(words):
+    return r'\b(?:%s)\b' % '|'.join(sorted(map(re.escape, words), key=len, reverse=True))
+
+# Every static signal as one regex over the raw source, with a named group per category.
+# It matches a superset of what the ast walk finds (comments and strings included), so a
+# category it finds nothing for can be dropped without parsing the file.
+_STATIC_SIGNAL_RE = re.compile(
+    "(?P<security>%s|%s|%s|%s)|(?P<performance>%s|%s|%s)" % (
+        _word_alternation(_SECURITY_MODULES),
+        r'\b(?:%s)\s*\(' % '|'.join(sorted(_SECURITY_CALLS)),
+        _SQL_KEYWORD_PATTERN,
+        _SECRET_NAME_PATTERN,
+        r'\b(?:for|while)\b',
+        r'\.(?:execute|executemany|raw)\b',
+        _word_alternation(_DATABASE_MODULES),
+    ),
+    re.IGNORECASE,
+)
+
+# Tokens reserved for the prompt template and response when packing files into one request
+BATCH_RESERVED_TOKENS = 2000
+# Token overhead of the FILE_X marker added around each file in a batched request
+FILE_MARKER_TOKENS = 100
+
+# Write buffer for the report file, and the longest a finished section may sit in it
+# before being flushed to disk
+SAVE_BUFFER_SIZE = 1 << 20
+SAVE_FLUSH_INTERVAL = 1.0
+
+# Language of each supported file extension
+LANGUAGE_BY_EXTENSION = {
+    '.py': 'python',
+    '.sql': 'sql',
+    '.pgsql': 'sql',
+    '.tsql': 'sql',
+    '.plsql': 'sql',
+}
+
+# Native path separator, looked up once instead of per path
+_SEP = os.sep
+
+# One non-blank, non-comment .scanignore line, without surrounding whitespace
+_SCANIGNORE_LINE_RE = re.compile(r'^[ \t]*([^#\s][^\r\n]*?)\s*$', re.MULTILINE)
+
+# libyaml's C parser when PyYAML was built with it, otherwise the pure-Python one
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def mtime_cache(func):
+    """
+    Cache the result of a function that parses the file given as its first argument.
+    
+    The file is stat'ed on every call and re-parsed only when its (st_mtime_ns, st_size)
+    changed. Missing or unreadable files are never cached. Cached values are shared between
+    callers and must not be modified.
+    
+    Args:
+        func (callable): Function taking the file path as its first argument
+        
+    Returns:
+        callable: The caching wrapper
+    """
+    cache = {}
+    lock = threading.Lock()
+    
+    @functools.wraps(func)
+    def wrapper(path, *args, **kwargs):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return func(path, *args, **kwargs)
+        
+        key = (path, args, tuple(sorted(kwargs.items())))
+        stamp = (st.st_mtime_ns, st.st_size)
+        with lock:
+            entry = cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        
+        result = func(path, *args, **kwargs)
+        with lock:
+            cache[key] = (stamp, result)
+        return result
+    
+    wrapper.cache_clear = cache.clear
+    return wrapper
+
+def get_config_cache_path(config_file):
+    """Path of the JSON copy of a YAML config file, e.g. config.cache.json for config.yaml."""
+    return os.path.splitext(config_file)[0] + '.cache.json'
+
+def read_config_cache(config_file):
+    """
+    Read the JSON copy of a config file, if it is at least as new as the YAML.
+    
+    Args:
+        config_file (str): Path to the YAML config file
+        
+    Returns:
+        The cached configuration, or None if there is no up-to-date cache
+    """
+    cache_path = get_config_cache_path(config_file)
+    try:
+        if os.stat(cache_path).st_mtime_ns < os.stat(config_file).st_mtime_ns:
+            return None
+        with open(cache_path, 'rb') as file:
+            data = file.read()
+        return orjson.loads(data) if orjson else json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+def write_config_cache(config_file, config):
+    """
+    Save a JSON copy of a parsed config file so later runs can skip the YAML parser.
+    
+    Configs that do not round-trip through JSON (e.g. YAML dates) are not cached.
+    
+    Args:
+        config_file (str): Path to the YAML config file
+        config: The parsed configuration
+    """
+    cache_path = get_config_cache_path(config_file)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        data = orjson.dumps(config) if orjson else json.dumps(config).encode('utf-8')
+        # JSON turns dates into strings, NaN into null (with orjson) and int keys into
+        # strings; only cache configs that read back exactly as parsed
+        if (orjson.loads(data) if orjson else json.loads(data)) != config:
+            logger.debug(f"Not caching config {config_file}: it does not round-trip through JSON")
+            return
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug(f"Could not cache config {config_file} as JSON: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+@mtime_cache
 def load_config(config_file='config.yaml'):
-    """Load configuration from a YAML file."""
+    """
+    Load configuration from a YAML file.
+    
+    A JSON copy written next to the file on first load is used instead of the YAML
+    whenever it is not older than it.
+    """
+    cached = read_config_cache(config_file)
+    if cached is not None:
+        return cached
+    
     try:
         with open(config_file, 'r') as file:
-            return yaml.safe_load(file)
+            config = yaml.load(file, Loader=YAML_LOADER)
+        write_config_cache(config_file, config)
+        return config
     except FileNotFoundError:
         logger.error(f"Config file '{config_file}' not found.")
         return {}
@@ -40,28 +243,60 @@ def load_scanignore(directory):
     # Get the directory where the script is located
     script_dir = os.path.dirname(os.path.abspath(__file__))
     scanignore_path = os.path.join(script_dir, '.scanignore')
-    patterns = []
     
+    if not os.path.exists(scanignore_path):
+        logger.info("No .scanignore file found in script directory. Using default exclusions.")
+        return []
+    
+    patterns = read_scanignore(scanignore_path)
+    logger.info(f"Loaded {len(patterns)} patterns from .scanignore (global setting)")
+    return list(patterns)
+
+@mtime_cache
+def read_scanignore(scanignore_path):
+    """
+    Parse the patterns of a .scanignore file.
+    
+    Args:
+        scanignore_path (str): Path to the .scanignore file
+        
+    Returns:
+        list: List of patterns to ignore
+    """
     try:
-        if os.path.exists(scanignore_path):
-            with open(scanignore_path, 'r') as file:
-                for line in file:
-                    # Strip whitespace and skip empty lines and comments
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        patterns.append(line)
-            logger.info(f"Loaded {len(patterns)} patterns from .scanignore (global setting)")
-        else:
-            logger.info("No .scanignore file found in script directory. Using default exclusions.")
+        with open(scanignore_path, 'r') as file:
+            # Skip empty lines and comments in a single pass over the whole file
+            return _SCANIGNORE_LINE_RE.findall(file.read())
     except Exception as e:
         logger.error(f"Error reading .scanignore: {e}")
+        return []
+
+def get_config_ignore_patterns(config):
+    """
+    Convert the scanning exclusions from config.yaml into ignore patterns.
+    
+    Excluded directories become directory-name patterns and excluded files are used as
+    base-name globs, so both are compiled once into the scan's IgnoreMatcher instead of
+    being checked per file.
     
+    Args:
+        config (dict): The loaded configuration
+        
+    Returns:
+        list: List of glob patterns to ignore
+    """
+    scanning = (config or {}).get('scanning') or {}
+    patterns = [f"{directory.rstrip('/')}/" for directory in scanning.get('excluded_directories') or []]
+    patterns.extend(scanning.get('excluded_files') or [])
     return patterns
 
+@functools.lru_cache(maxsize=1)
 def initialize_client():
     """
     Initialize a HuggingFace client using the API key from environment variables.
     
+    The key is resolved once per process and cached.
+    
     Returns:
         str: The API key for HuggingFace
     """
@@ -72,7 +307,7 @@ def initialize_client():
     if not api_key:
         try:
             with open(os.path.expanduser("~/.cerebras/config.yaml"), "r") as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=YAML_LOADER)
                 api_key = config.get("api_key")
         except (FileNotFoundError, yaml.YAMLError):
             pass
@@ -313,9 +548,7 @@ def get_batch_formatted_prompt(repository, language, category, subcategory_ids,
             return None, []
             
         # Create a combined prompt for all subcategories
-        combined_template = f"""You are an expert {language} code analyzer specializing in {category} analysis.
-        
-Analyze the following code for {category} issues, addressing EACH of these specific areas:
+        combined_template = f"""Analyze the following {language} code for {category} issues, addressing EACH of these specific areas:
 
 {chr(10).join(subcategory_prompts)}
 
@@ -337,81 +570,349 @@ CODE TO ANALYZE:
         logger.error(f"Error formatting batch prompt: {e}")
         return None, []
 
-def analyze_with_cerebras(prompt, model=None):
+class MockResponse:
+    """Chat-completion shaped wrapper around a plain text generation result."""
+    def __init__(self, response_text):
+        self.choices = [MockChoice(response_text)]
+
+class MockChoice:
+    def __init__(self, text):
+        self.message = MockMessage(text)
+
+class MockMessage:
+    def __init__(self, content):
+        self.content = content
+
+class ResponseCache:
+    """
+    SQLite-backed cache of API responses, keyed by a hash of the model and full prompt.
+    
+    Lets reruns over unchanged files skip the API entirely. Safe to share between the
+    scanner's worker threads.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, response TEXT)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(model, prompt):
+        return hashlib.blake2b(f"{model}\0{prompt}".encode('utf-8'), digest_size=16).hexdigest()
+    
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def put(self, key, model, response):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response) VALUES (?, ?, ?)",
+                (key, model, response)
+            )
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Cache used by analyze_with_cerebras; disabled until configure_response_cache is called
+_response_cache = None
+
+def configure_response_cache(path):
+    """
+    Enable (or, with a falsy path, disable) the on-disk API response cache.
+    
+    Args:
+        path (str): Path to the SQLite cache file, or None to disable caching
+        
+    Returns:
+        ResponseCache: The active cache, or None if caching is disabled
+    """
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+        _response_cache = None
+    if path:
+        try:
+            _response_cache = ResponseCache(path)
+            logger.info(f"Using response cache at {path}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open response cache {path}: {e}")
+    return _response_cache
+
+# Inference client shared by all worker threads, created on first use
+_inference_client = None
+_inference_client_lock = threading.Lock()
+
+def get_inference_client():
+    """
+    Get the shared HuggingFace inference client, creating it on first use.
+    
+    The client is created under a lock so concurrent workers starting together still
+    end up sharing one client, and with it the keep-alive connections of its session.
+    
+    Returns:
+        InferenceClient: The client
+    """
+    global _inference_client
+    if _inference_client is None:
+        with _inference_client_lock:
+            if _inference_client is None:
+                _inference_client = InferenceClient(token=initialize_client())
+    return _inference_client
+
+def analyze_with_cerebras(prompt, model=None, client=None):
     """
     Send a prompt to the HuggingFace Inference API.
     
     Args:
         prompt (str): The prompt to send
         model (str): Unused parameter, kept for compatibility
+        client (InferenceClient): Client to use, defaults to the shared client
         
     Returns:
         dict: The API response
     """
     try:
-        # Hard-coded model name as specified
-        model_name = "meta-llama/Llama-3.3-70B-Instruct"
-        api_key = initialize_client()
-        
-        # Initialize the client with the token
-        client = InferenceClient(token=api_key)
-        
-        logger.info(f"Sending request to HuggingFace Inference API using {model_name} model")
+        full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
+        
+        # Serve identical prompts from a previous run without calling the API; cache errors
+        # are logged and treated as a miss
+        cache = _response_cache
+        if cache is not None:
+            cache_key = cache.make_key(MODEL_NAME, full_prompt)
+            try:
+                cached = cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Error reading response cache: {e}")
+                cached = None
+            if cached is not None:
+                logger.info("Using cached response for identical prompt")
+                return MockResponse(cached)
+        
+        if client is None:
+            client = get_inference_client()
+        
+        logger.info(f"Sending request to HuggingFace Inference API using {MODEL_NAME} model")
         
         # Send the request to the HuggingFace API
         response = client.text_generation(
-            f"You are an expert code analyzer specializing in security, performance, and code quality.\n\n{prompt}",
-            model=model_name,
+            full_prompt,
+            model=MODEL_NAME,
             max_new_tokens=2048,
             temperature=0.1,
             top_p=0.95,
         )
         
-        # Create a response object with the same structure as expected by the rest of the code
-        class MockResponse:
-            def __init__(self, response_text):
-                self.choices = [MockChoice(response_text)]
-        
-        class MockChoice:
-            def __init__(self, text):
-                self.message = MockMessage(text)
-        
-        class MockMessage:
-            def __init__(self, content):
-                self.content = content
+        # A failed cache write must not discard a successful response
+        if cache is not None:
+            try:
+                cache.put(cache_key, MODEL_NAME, response)
+            except Exception as e:
+                logger.warning(f"Error writing response cache: {e}")
         
-        # Return the mock response
+        # Return a response object with the same structure as expected by the rest of the code
         return MockResponse(response)
         
     except Exception as e:
         logger.error(f"Error analyzing code with HuggingFace: {e}")
         return None
 
-def should_scan_file(file_path):
+def should_scan_file(file_path, check_exists=True):
     """
     Determine if a file should be scanned based on its extension.
     
     Args:
         file_path (str): Path to the file
+        check_exists (bool): Stat the path to make sure it is a regular file. Callers
+            that already know this (e.g. from os.walk) pass False to skip the syscall.
         
     Returns:
         tuple: (should_scan, language) where should_scan is a boolean and language is 'python', 'sql', or None
     """
+    # Check the extension first; most files are rejected here without touching the disk
+    language = LANGUAGE_BY_EXTENSION.get(os.path.splitext(file_path)[1].lower())
+    if language is None:
+        return False, None
+    
     # Check if file exists
-    if not os.path.isfile(file_path):
+    if check_exists and not os.path.isfile(file_path):
         return False, None
     
-    # Get the extension
-    _, ext = os.path.splitext(file_path)
-    ext = ext.lower()
+    return True, language
+
+def compile_glob_patterns(patterns):
+    """
+    Compile glob patterns into a single regular expression.
     
-    # Check if it's a supported extension
-    if ext == '.py':
-        return True, 'python'
-    elif ext in ['.sql', '.pgsql', '.tsql', '.plsql']:
-        return True, 'sql'
+    Args:
+        patterns (list): List of glob patterns
+        
+    Returns:
+        re.Pattern: A regex matching any of the patterns in full, or None if there are none
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+def translate_segment_glob(pattern):
+    """
+    Translate a glob for a single path segment into a regex whose wildcards stop at '/'.
     
-    return False, None
+    Args:
+        pattern (str): Glob pattern without '/'
+        
+    Returns:
+        str: Unanchored regex source
+    """
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        i += 1
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append('\\[')
+            else:
+                chars = pattern[i:j].replace('\\', '\\\\')
+                i = j + 1
+                if chars.startswith('!'):
+                    chars = '^' + chars[1:]
+                elif chars.startswith('^'):
+                    chars = '\\' + chars
+                parts.append(f'[{chars}]')
+        else:
+            parts.append(re.escape(char))
+    return ''.join(parts)
+
+def _has_glob_magic(pattern):
+    return any(char in pattern for char in '*?[')
+
+class IgnoreMatcher:
+    """
+    Precompiled form of a list of .scanignore-style glob patterns.
+    
+    Patterns ending in '/' match a directory name at any depth, other patterns containing
+    '/' match the whole path, and the rest match the base name. Names without glob
+    metacharacters (e.g. '.git/', '.env') are kept in sets; the remaining globs of each
+    group are compiled into one regex, so most paths never reach the regex engine, and
+    glob directory names are found with a single search over the whole path.
+    """
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        
+        self.literal_dirs = set()
+        self.literal_names = set()
+        dir_patterns = []
+        path_patterns = []
+        name_patterns = []
+        for pattern in self.patterns:
+            if pattern.endswith('/'):
+                name = pattern.rstrip('/')
+                if '/' in name:
+                    # Nested directory: match it, and anything under it, at any depth
+                    path_patterns.extend([name, f"{name}/*", f"*/{name}", f"*/{name}/*"])
+                elif not name:
+                    continue
+                elif _has_glob_magic(name):
+                    dir_patterns.append(name)
+                else:
+                    self.literal_dirs.add(name)
+            elif pattern.startswith('**/') and '/' not in pattern[3:]:
+                # '**/name' matches the name at any depth, which is what base-name matching does
+                name = pattern[3:]
+                if _has_glob_magic(name):
+                    name_patterns.append(name)
+                else:
+                    self.literal_names.add(name)
+            elif '/' in pattern:
+                path_patterns.append(pattern)
+            elif _has_glob_magic(pattern):
+                name_patterns.append(pattern)
+            else:
+                self.literal_names.add(pattern)
+        
+        self.dir_re = None
+        if dir_patterns:
+            self.dir_re = re.compile(
+                "(?:^|/)(?:%s)(?:/|$)" % "|".join(translate_segment_glob(p) for p in dir_patterns)
+            )
+        self.path_re = compile_glob_patterns(path_patterns)
+        self.name_re = compile_glob_patterns(name_patterns)
+    
+    def matches(self, path):
+        """
+        Check if a path matches any of the patterns.
+        
+        Args:
+            path (str): The path to check, relative to the scan root
+            
+        Returns:
+            bool: True if the path matches, False otherwise
+        """
+        if _SEP != '/':
+            path = path.replace(_SEP, '/')
+        parts = path.split('/')
+        basename = parts[-1]
+        
+        # Cheap set lookups first
+        if basename in self.literal_names:
+            return True
+        if self.literal_dirs and not self.literal_dirs.isdisjoint(parts):
+            return True
+        
+        if self.name_re and self.name_re.match(basename):
+            return True
+        if self.path_re and self.path_re.match(path):
+            return True
+        if self.dir_re and self.dir_re.search(path):
+            return True
+        return False
+    
+    def matches_entry(self, rel_path, name):
+        """
+        Check if a directory entry matches any of the patterns, given its parents do not.
+        
+        Used by directory walks that already pruned ignored parents: only the entry's own
+        name is checked against the name and directory patterns, so the path never needs
+        to be split.
+        
+        Args:
+            rel_path (str): '/'-separated path of the entry, relative to the scan root
+            name (str): The entry's base name
+            
+        Returns:
+            bool: True if the entry matches, False otherwise
+        """
+        if name in self.literal_names or name in self.literal_dirs:
+            return True
+        if self.name_re and self.name_re.match(name):
+            return True
+        if self.dir_re and self.dir_re.search(name):
+            return True
+        if self.path_re and self.path_re.match(rel_path):
+            return True
+        return False
+
+@functools.lru_cache(maxsize=32)
+def _get_ignore_matcher(patterns):
+    return IgnoreMatcher(patterns)
 
 def should_ignore_path(path, ignore_patterns):
     """
@@ -419,14 +920,180 @@ def should_ignore_path(path, ignore_patterns):
     
     Args:
         path (str): The path to check
-        ignore_patterns (list): List of glob patterns to ignore
+        ignore_patterns (list or IgnoreMatcher): Glob patterns to ignore, or a matcher
+            already compiled from them
         
     Returns:
         bool: True if the path should be ignored, False otherwise
     """
-    for pattern in ignore_patterns:
-        if fnmatch.fnmatch(path, pattern):
-            return True
+    if not isinstance(ignore_patterns, IgnoreMatcher):
+        ignore_patterns = _get_ignore_matcher(tuple(ignore_patterns))
+    return ignore_patterns.matches(path)
+
+def read_source_file(file_path, size):
+    """
+    Read a UTF-8 source file whose size is already known.
+    
+    Issues a single open/read/close using the size from the directory walk, instead of
+    going through the buffered text layer and growing the read buffer.
+    
+    Args:
+        file_path (str): Path to the file
+        size (int): Size of the file in bytes, from a previous stat
+        
+    Returns:
+        str: The decoded file content, with newlines normalized to '\\n'
+    """
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        chunks = []
+        # Ask for one byte more than expected so a file that grew is still read in full
+        chunk = os.read(fd, size + 1)
+        while chunk:
+            chunks.append(chunk)
+            chunk = os.read(fd, 1 << 16)
+    finally:
+        os.close(fd)
+    
+    content = b"".join(chunks).decode('utf-8')
+    # Match the universal-newline behaviour of open(..., 'r')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+def screen_static_signals(content, wanted=frozenset(('security', 'performance'))):
+    """
+    Find which analysis categories the source text may have static signals for.
+    
+    A single pass of one compiled multi-pattern regex over the raw text. It may report
+    categories that find_static_signals would reject, but never misses one it would find.
+    
+    Args:
+        content (str): The source code
+        wanted (set): Categories to look for; the scan stops once all are found
+        
+    Returns:
+        set: Subset of wanted
+    """
+    signals = set()
+    for match in _STATIC_SIGNAL_RE.finditer(content):
+        if match.lastgroup in wanted:
+            signals.add(match.lastgroup)
+            if len(signals) == len(wanted):
+                break
+    return signals
+
+def find_static_signals(tree, wanted=frozenset(('security', 'performance'))):
+    """
+    Find which analysis categories a parsed Python module has static signals for.
+    
+    This is a deliberately generous screen: any risky import, builtin, SQL-looking string
+    or secret-looking name counts as a security signal, and any loop, comprehension or
+    database use counts as a performance signal.
+    
+    Args:
+        tree (ast.AST): The parsed module
+        wanted (set): Categories to look for; the walk stops once all are found
+        
+    Returns:
+        set: Subset of {'security', 'performance'}
+    """
+    signals = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.While, ast.ListComp, ast.SetComp,
+                             ast.DictComp, ast.GeneratorExp)):
+            signals.add('performance')
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if isinstance(node, ast.ImportFrom):
+                modules = [node.module or '']
+            else:
+                modules = [alias.name for alias in node.names]
+            for module in modules:
+                root = module.split('.', 1)[0]
+                if root in _SECURITY_MODULES:
+                    signals.add('security')
+                if root in _DATABASE_MODULES:
+                    signals.add('performance')
+        elif isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Name) and func.id in _SECURITY_CALLS:
+                signals.add('security')
+            elif isinstance(func, ast.Attribute) and func.attr in ('execute', 'executemany', 'raw'):
+                signals.update(('security', 'performance'))
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if _SQL_KEYWORD_RE.search(node.value):
+                signals.update(('security', 'performance'))
+        elif isinstance(node, (ast.Name, ast.arg, ast.Attribute, ast.keyword)):
+            name = getattr(node, 'id', None) or getattr(node, 'arg', None) or getattr(node, 'attr', None)
+            if name and _SECRET_NAME_RE.search(name):
+                signals.add('security')
+        
+        if signals >= wanted:
+            break
+    return signals
+
+def prefilter_categories(file_path, content, language, categories, repository):
+    """
+    Drop the categories that static rules show are not worth an API call for this file.
+    
+    Only security and performance analyses of Python files up to PREFILTER_MAX_LINES lines
+    are screened; every other category and language is kept as is. A category the text
+    screen finds nothing for is dropped without parsing; the others are confirmed with an
+    ast walk, and kept as is if the file does not parse (or is too deeply nested to).
+    
+    Args:
+        file_path (str): Path to the file, used for logging
+        content (str): Content of the file
+        language (str): The language of the file
+        categories (list): Requested categories, or None/empty for all
+        repository (dict): The prompt repository
+        
+    Returns:
+        list: The categories to analyze
+    """
+    if not categories:
+        categories = list(((repository or {}).get("categories") or {}).get(language, {}).keys())
+    if language != 'python' or content.count('\n') >= PREFILTER_MAX_LINES:
+        return categories
+    
+    # Cheap text screen first; only parse to confirm the categories it could not rule out
+    screened = {'security', 'performance'}.intersection(categories)
+    if screened:
+        screened = screen_static_signals(content, frozenset(screened))
+    signals = set()
+    if screened:
+        try:
+            signals = find_static_signals(ast.parse(content), frozenset(screened))
+        except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+            # Deeply nested or huge code must not abort the scan; analyze it in full instead
+            logger.debug(f"Not pre-filtering {file_path}: {type(e).__name__}")
+            return categories
+    
+    kept = [c for c in categories if c not in ('security', 'performance') or c in signals]
+    skipped = [c for c in categories if c not in kept]
+    if skipped:
+        logger.info(f"Skipping {', '.join(skipped)} analysis for {file_path} (no static signal)")
+    return kept
+
+def is_trivial_content(file_path, content, min_size=MIN_SCAN_SIZE):
+    """
+    Check whether a file is too small to be worth sending to the API.
+    
+    Args:
+        file_path (str): Path to the file, used for logging
+        content (str): Content of the file
+        min_size (int): Minimum stripped content length worth analyzing
+        
+    Returns:
+        bool: True if the file should be skipped, False otherwise
+    """
+    stripped = content.strip()
+    if not stripped:
+        logger.warning(f"Skipping {file_path} (empty file)")
+        return True
+    if len(stripped) < min_size:
+        logger.info(f"Skipping {file_path} (trivial file, {len(stripped)} characters)")
+        return True
     return False
 
 def split_into_batches(items, max_batch_size=3):
@@ -442,7 +1109,8 @@ def split_into_batches(items, max_batch_size=3):
     """
     return [items[i:i + max_batch_size] for i in range(0, len(items), max_batch_size)]
 
-def scan_file(file_path, repository=None, categories=None, subcategories=None, legacy_mode=False):
+def scan_file(file_path, repository=None, categories=None, subcategories=None, legacy_mode=False,
+              language=None, content=None, min_size=MIN_SCAN_SIZE, prefilter=True):
     """
     Scan a single file for issues.
     
@@ -452,28 +1120,33 @@ def scan_file(file_path, repository=None, categories=None, subcategories=None, l
         categories (list): List of categories to scan
         subcategories (list): List of subcategories to scan
         legacy_mode (bool): Use legacy mode
+        language (str): Language already resolved by the caller; skips re-checking the file
+        content (str): File content already read by the caller; skips re-reading the file
+        min_size (int): Minimum stripped content length worth sending to the API
+        prefilter (bool): Skip categories that static rules show have nothing to analyze
         
     Returns:
         dict: The scan result
     """
     try:
-        # Determine the language
-        should_scan, language = should_scan_file(file_path)
-        if not should_scan or not language:
-            logger.warning(f"Skipping {file_path} (unsupported file type)")
-            return None
-        
-        # Read the file content
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            logger.error(f"Error reading file {file_path}: {e}")
-            return None
-        
-        # Skip empty files
-        if not content.strip():
-            logger.warning(f"Skipping {file_path} (empty file)")
+        # Determine the language unless the caller already did
+        if not language:
+            should_scan, language = should_scan_file(file_path)
+            if not should_scan or not language:
+                logger.warning(f"Skipping {file_path} (unsupported file type)")
+                return None
+        
+        # Read the file content unless the caller already did
+        if content is None:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                logger.error(f"Error reading file {file_path}: {e}")
+                return None
+        
+        # Skip empty and trivially small files (e.g. bare __init__.py) without calling the API
+        if is_trivial_content(file_path, content, min_size):
             return None
         
         # Prepare the result object
@@ -488,6 +1161,12 @@ def scan_file(file_path, repository=None, categories=None, subcategories=None, l
             categories = ["security", "performance"]
             subcategories = None
         
+        # Drop categories with no static signal before spending API calls on them
+        if prefilter:
+            categories = prefilter_categories(file_path, content, language, categories, repository)
+            if not categories:
+                return None
+        
         # Get relevant prompts for this language
         language_prompts = get_prompts_for_language(repository, language, categories, subcategories)
         if not language_prompts:
@@ -531,13 +1210,14 @@ def scan_file(file_path, repository=None, categories=None, subcategories=None, l
         logger.error(f"Error scanning file {file_path}: {e}")
         return None
 
-def combine_file_contents(files_to_batch, language):
+def combine_file_contents(files_to_batch, language, contents=None):
     """
     Combine the contents of multiple files with clear dividers for batch processing.
     
     Args:
         files_to_batch (list): List of file paths to combine
         language (str): The language of the files
+        contents (dict): Optional mapping of file path to already-read content
         
     Returns:
         tuple: (combined_content, file_info) where file_info is a list of dicts with file details
@@ -548,8 +1228,11 @@ def combine_file_contents(files_to_batch, language):
     
     for idx, file_path in enumerate(files_to_batch):
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            if contents is not None and file_path in contents:
+                content = contents[file_path]
+            else:
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    content = file.read()
                 
             if not content.strip():
                 logger.warning(f"File {file_path} is empty, skipping")
@@ -636,7 +1319,7 @@ def get_optimal_batch_size(files, language, max_tokens=6000):
         list: List of batches, where each batch is a list of file paths
     """
     # Reserve tokens for prompt template and response
-    available_tokens = max_tokens - 2000  # Reserve 2000 tokens for prompt template and overhead
+    available_tokens = max_tokens - BATCH_RESERVED_TOKENS
     
     batches = []
     current_batch = []
@@ -648,7 +1331,7 @@ def get_optimal_batch_size(files, language, max_tokens=6000):
                 content = file.read()
                 
             file_token_count = estimate_tokens(content)
-            file_with_markers_token_count = file_token_count + 100  # Add overhead for file markers
+            file_with_markers_token_count = file_token_count + FILE_MARKER_TOKENS
             
             # If adding this file would exceed the token limit, start a new batch
             if current_batch and (current_token_count + file_with_markers_token_count > available_tokens):
@@ -671,10 +1354,157 @@ def get_optimal_batch_size(files, language, max_tokens=6000):
     logger.info(f"Split {len(files)} files into {len(batches)} optimized batches based on token estimates")
     return batches
 
-def scan_directory(directory_path, repository=None, categories=None, subcategories=None, 
-                  ignore_patterns=None, legacy_mode=False, files_per_batch=3, max_tokens=6000):
+def iter_candidate_files(directory_path, ignore_patterns):
     """
-    Scan a directory for issues.
+    Walk a directory and yield the files that should be scanned.
+    
+    Uses os.scandir directly so file types come from the directory listing, and only
+    files with a supported extension are stat'ed for their size.
+    
+    Args:
+        directory_path (str): Path to the directory to walk
+        ignore_patterns (list or IgnoreMatcher): Glob patterns to ignore, matched against
+            paths relative to directory_path
+        
+    Yields:
+        tuple: (file_path, language, size) for each scannable file
+    """
+    # Compile the patterns once for the whole walk
+    if not isinstance(ignore_patterns, IgnoreMatcher):
+        ignore_patterns = IgnoreMatcher(ignore_patterns)
+    
+    # (directory path, '/'-separated path relative to the scan root with trailing '/')
+    stack = [(directory_path, '')]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    rel_path = rel_dir + name
+                    try:
+                        # Skip ignored directories (symlinked directories are not followed)
+                        if entry.is_dir(follow_symlinks=False):
+                            if not ignore_patterns.matches_entry(rel_path, name):
+                                subdirs.append((entry.path, rel_path + '/'))
+                            continue
+                        
+                        # Check the extension before paying for a stat
+                        should_scan, language = should_scan_file(name, check_exists=False)
+                        if not should_scan or not entry.is_file():
+                            continue
+                        
+                        # Skip if the file should be ignored
+                        if ignore_patterns.matches_entry(rel_path, name):
+                            continue
+                        
+                        yield entry.path, language, entry.stat().st_size
+                    except OSError as e:
+                        logger.warning(f"Error reading {entry.path}: {e}")
+        except OSError as e:
+            logger.error(f"Error listing directory {dir_path}: {e}")
+        
+        # Visit subdirectories in listing order
+        stack.extend(reversed(subdirs))
+
+def iter_file_contents(candidates, max_workers=DEFAULT_READ_WORKERS, read_ahead=READ_AHEAD,
+                       min_size=MIN_SCAN_SIZE):
+    """
+    Read candidate files on a thread pool so disk I/O overlaps with the API calls.
+    
+    Args:
+        candidates (iterable): (file_path, language, size) tuples, e.g. from iter_candidate_files
+        max_workers (int): Number of reader threads
+        read_ahead (int): Maximum number of files read but not yet consumed
+        min_size (int): Files smaller than this many bytes are skipped unread
+        
+    Yields:
+        tuple: (file_path, language, content) in input order; unreadable files are skipped
+    """
+    def read(file_path, size):
+        try:
+            return read_source_file(file_path, size)
+        except Exception as e:
+            logger.error(f"Error reading file {file_path}: {e}")
+            return None
+    
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for file_path, language, size in candidates:
+            # A file smaller than the minimum in bytes cannot pass the trivial-content check
+            if size < min_size:
+                logger.info(f"Skipping {file_path} (trivial file, {size} bytes)")
+                continue
+            
+            pending.append((file_path, language, executor.submit(read, file_path, size)))
+            
+            # Hand back files that are already read, and block once the read-ahead is full
+            while pending and (len(pending) >= read_ahead or pending[0][2].done()):
+                file_path, language, future = pending.popleft()
+                content = future.result()
+                if content is not None:
+                    yield file_path, language, content
+        
+        while pending:
+            file_path, language, future = pending.popleft()
+            content = future.result()
+            if content is not None:
+                yield file_path, language, content
+
+def scan_files(files, language, repository=None, categories=None, subcategories=None, legacy_mode=False):
+    """
+    Scan already-read files of one language, packing them into a single API call when possible.
+    
+    Args:
+        files (list): List of (file_path, content) tuples
+        language (str): The language of the files
+        repository (dict): The prompt repository
+        categories (list): List of categories to scan
+        subcategories (list): List of subcategories to scan
+        legacy_mode (bool): Use legacy mode
+        
+    Returns:
+        dict: Mapping of file path to its scan result
+    """
+    try:
+        if len(files) == 1:
+            file_path, content = files[0]
+            result = scan_file(
+                file_path=file_path,
+                repository=repository,
+                categories=categories,
+                subcategories=subcategories,
+                legacy_mode=legacy_mode,
+                language=language,
+                content=content,
+                prefilter=False
+            )
+            return {file_path: result}
+        
+        batch_results = scan_file_batch(
+            [file_path for file_path, _ in files],
+            language,
+            repository,
+            categories=categories,
+            subcategories=subcategories,
+            legacy_mode=legacy_mode,
+            contents=dict(files)
+        )
+        return {result["file_path"]: result for result in batch_results}
+    except Exception as e:
+        logger.error(f"Error scanning batch of {len(files)} {language} files: {e}")
+        return {}
+
+def iter_scan_directory(directory_path, repository=None, categories=None, subcategories=None, 
+                       ignore_patterns=None, legacy_mode=False, files_per_batch=3, max_tokens=6000,
+                       max_workers=DEFAULT_MAX_WORKERS, prefilter=True, min_size=MIN_SCAN_SIZE):
+    """
+    Scan a directory for issues, yielding each file's result as soon as it is ready.
+    
+    Small files of the same language and categories are packed into one API call (up to
+    files_per_batch files and max_tokens tokens), and batches are analyzed concurrently on a thread pool
+    so that API round trips overlap. Results are still yielded in directory walk order.
     
     Args:
         directory_path (str): Path to the directory to scan
@@ -685,10 +1515,19 @@ def scan_directory(directory_path, repository=None, categories=None, subcategori
         legacy_mode (bool): Use legacy mode
         files_per_batch (int): Number of files to process in a batch
         max_tokens (int): Maximum tokens per API call
+        max_workers (int): Maximum number of batches analyzed concurrently
+        prefilter (bool): Skip categories that static rules show have nothing to analyze
+        min_size (int): Minimum stripped content length worth sending to the API
         
-    Returns:
-        list: The scan results
+    Yields:
+        dict: The scan result for each file with findings
     """
+    # Resolve legacy mode up front so every file uses the same categories
+    if legacy_mode:
+        categories = ["security", "performance"]
+        subcategories = None
+        legacy_mode = False
+    
     if ignore_patterns is None:
         ignore_patterns = []
     
@@ -697,42 +1536,124 @@ def scan_directory(directory_path, repository=None, categories=None, subcategori
     if scanignore_patterns:
         ignore_patterns.extend(scanignore_patterns)
     
-    results = []
-    
-    # Walk through the directory
-    for root, dirs, files in os.walk(directory_path):
-        # Skip ignored directories
-        dirs[:] = [d for d in dirs if not should_ignore_path(os.path.join(root, d), ignore_patterns)]
-        
-        # Process each file
-        for file in files:
-            file_path = os.path.join(root, file)
-            
-            # Skip if the file should be ignored
-            if should_ignore_path(file_path, ignore_patterns):
-                continue
-            
-            # Check if this is a file type we can scan
-            should_scan, _ = should_scan_file(file_path)
-            if not should_scan:
-                continue
-            
-            # Scan the file
-            result = scan_file(
-                file_path=file_path,
+    max_workers = max(1, max_workers)
+    files_per_batch = max(1, files_per_batch)
+    available_tokens = max_tokens - BATCH_RESERVED_TOKENS
+    # Bound the number of outstanding files so memory stays flat on large trees
+    max_pending = max_workers * files_per_batch * 2
+    
+    # Batch (and source path) keyed by (language, content digest) so identical files are only analyzed once
+    batches_by_digest = {}
+    # Batch still being filled for each (language, categories)
+    open_batches = {}
+    # (file_path, source_path, batch) in walk order
+    pending = deque()
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit(batch):
+            if open_batches.get(batch["key"]) is batch:
+                del open_batches[batch["key"]]
+            batch["future"] = executor.submit(
+                scan_files,
+                batch["files"],
+                batch["language"],
                 repository=repository,
-                categories=categories,
+                categories=batch["categories"],
                 subcategories=subcategories,
                 legacy_mode=legacy_mode
             )
+        
+        def drain_one():
+            file_path, source_path, batch = pending.popleft()
+            if batch["future"] is None:
+                submit(batch)
+            result = batch["future"].result().get(source_path)
+            # The batch stays reachable for deduplication; only its results are still needed
+            batch["files"] = None
+            if not result:
+                return None
+            if file_path != source_path:
+                logger.info(f"Reusing analysis for {file_path} (identical content already scanned)")
+                return dict(result, file_path=file_path)
+            return result
+        
+        candidates = iter_candidate_files(directory_path, ignore_patterns)
+        for file_path, language, content in iter_file_contents(candidates, min_size=min_size):
+            if is_trivial_content(file_path, content, min_size):
+                continue
             
+            # Reuse the analysis of an identical file instead of calling the API again
+            digest_key = (language, hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest())
+            if digest_key in batches_by_digest:
+                batch, source_path = batches_by_digest[digest_key]
+                pending.append((file_path, source_path, batch))
+            else:
+                file_categories = categories
+                if prefilter:
+                    file_categories = prefilter_categories(file_path, content, language, categories, repository)
+                    if not file_categories:
+                        continue
+                
+                file_tokens = estimate_tokens(content) + FILE_MARKER_TOKENS
+                batch_key = (language, tuple(file_categories or ()))
+                batch = open_batches.get(batch_key)
+                if batch and batch["tokens"] + file_tokens > available_tokens:
+                    submit(batch)
+                    batch = None
+                if batch is None:
+                    batch = {"key": batch_key, "language": language, "categories": file_categories,
+                             "files": [], "tokens": 0, "future": None}
+                    open_batches[batch_key] = batch
+                batch["files"].append((file_path, content))
+                batch["tokens"] += file_tokens
+                batches_by_digest[digest_key] = (batch, file_path)
+                pending.append((file_path, file_path, batch))
+                if len(batch["files"]) >= files_per_batch:
+                    submit(batch)
+            
+            # Hand back finished results early, and block once too many are outstanding
+            while pending and (len(pending) >= max_pending or
+                               (pending[0][2]["future"] is not None and pending[0][2]["future"].done())):
+                result = drain_one()
+                if result:
+                    yield result
+        
+        # Flush the partially filled batches before waiting on the rest
+        for batch in list(open_batches.values()):
+            submit(batch)
+        
+        while pending:
+            result = drain_one()
             if result:
-                results.append(result)
+                yield result
+
+def scan_directory(directory_path, repository=None, categories=None, subcategories=None, 
+                  ignore_patterns=None, legacy_mode=False, files_per_batch=3, max_tokens=6000,
+                  max_workers=DEFAULT_MAX_WORKERS, prefilter=True, min_size=MIN_SCAN_SIZE):
+    """
+    Scan a directory for issues.
     
-    return results
+    Eager counterpart of iter_scan_directory; see it for the arguments.
+    
+    Returns:
+        list: The scan results
+    """
+    return list(iter_scan_directory(
+        directory_path,
+        repository=repository,
+        categories=categories,
+        subcategories=subcategories,
+        ignore_patterns=ignore_patterns,
+        legacy_mode=legacy_mode,
+        files_per_batch=files_per_batch,
+        max_tokens=max_tokens,
+        max_workers=max_workers,
+        prefilter=prefilter,
+        min_size=min_size
+    ))
 
 def scan_file_batch(file_batch, language, repository, categories=None, subcategories=None, 
-                   model="google/gemma-7b-it", legacy_mode=False):
+                   model="google/gemma-7b-it", legacy_mode=False, contents=None):
     """
     Scan a batch of files of the same language.
     
@@ -744,6 +1665,7 @@ def scan_file_batch(file_batch, language, repository, categories=None, subcatego
         subcategories (list, optional): List of subcategory IDs to scan
         model (str): The model to use
         legacy_mode (bool): If True, use legacy scanning
+        contents (dict): Optional mapping of file path to already-read content
         
     Returns:
         list: Results of the scan for each file
@@ -752,7 +1674,7 @@ def scan_file_batch(file_batch, language, repository, categories=None, subcatego
         return []
         
     # Combine file contents with clear dividers
-    combined_content, file_info = combine_file_contents(file_batch, language)
+    combined_content, file_info = combine_file_contents(file_batch, language, contents)
     
     if not combined_content or not file_info:
         logger.warning("No valid content to analyze in the batch")
@@ -794,9 +1716,7 @@ def scan_file_batch(file_batch, language, repository, categories=None, subcatego
             logger.info(f"Processing subcategory batch {batch_idx+1}/{len(subcategory_batches)} with {len(subcategory_batch)} subcategories: {subcategory_batch}")
             
             # Create a multi-file batch prompt
-            batch_prompt = f"""You are an expert {language} code analyzer specializing in {category} analysis.
-
-Analyze the following code files for {category} issues. Each file is marked with a clear FILE_X header.
+            batch_prompt = f"""Analyze the following {language} code files for {category} issues. Each file is marked with a clear FILE_X header.
 Treat each file separately and provide analysis for EACH file with clear file markers in your response.
 
 For each file, address these specific areas:
@@ -898,72 +1818,99 @@ def format_results_markdown(results):
     Format scan results as a Markdown document.
     
     Args:
-        results (list): Results of the scan
+        results (iterable): Results of the scan
         
     Returns:
         str: Markdown formatted results
     """
-    if not results:
-        return "# Scan Results\n\nNo results found."
+    return "".join(iter_results_markdown(results))
+
+def iter_results_markdown(results):
+    """
+    Format scan results as Markdown, one file section at a time.
     
-    markdown = "# Code Scan Results\n\n"
+    Results are consumed lazily, so this can be fed directly from iter_scan_directory.
     
+    Args:
+        results (iterable): Results of the scan
+        
+    Yields:
+        str: The report header, then one Markdown section per file
+    """
+    has_results = False
     for file_result in results:
-        file_path = file_result["file_path"]
-        language = file_result["language"].capitalize()
-        
-        markdown += f"## {os.path.basename(file_path)}\n"
-        markdown += f"**File:** {file_path}  \n"
-        markdown += f"**Language:** {language}\n\n"
-        
-        # Group analyses by category
-        analyses_by_category = {}
-        for analysis in file_result["analyses"]:
-            category = analysis["category"]
-            if category not in analyses_by_category:
-                analyses_by_category[category] = []
-            analyses_by_category[category].append(analysis)
-        
-        # Add each category section
-        for category, analyses in analyses_by_category.items():
-            markdown += f"### {category.capitalize()} Analysis\n\n"
-            
-            # Track which batched responses we've already processed
-            processed_contents = set()
+        if not has_results:
+            yield "# Code Scan Results\n\n"
+            has_results = True
+        yield format_file_result_markdown(file_result)
+    
+    if not has_results:
+        yield "# Scan Results\n\nNo results found."
+
+def format_file_result_markdown(file_result):
+    """
+    Format the scan result of a single file as a Markdown section.
+    
+    Args:
+        file_result (dict): The scan result for one file
+        
+    Returns:
+        str: Markdown formatted section
+    """
+    parts = []
+    
+    file_path = file_result["file_path"]
+    language = file_result["language"].capitalize()
+    
+    parts.append(f"## {os.path.basename(file_path)}\n")
+    parts.append(f"**File:** {file_path}  \n")
+    parts.append(f"**Language:** {language}\n\n")
+    
+    # Group analyses by category
+    analyses_by_category = {}
+    for analysis in file_result["analyses"]:
+        category = analysis["category"]
+        if category not in analyses_by_category:
+            analyses_by_category[category] = []
+        analyses_by_category[category].append(analysis)
+    
+    # Add each category section
+    for category, analyses in analyses_by_category.items():
+        parts.append(f"### {category.capitalize()} Analysis\n\n")
+        
+        # Track which batched responses we've already processed
+        processed_contents = set()
+        
+        for analysis in analyses:
+            subcategory = analysis["subcategory"]
+            subcategory_id = analysis["subcategory_id"]
+            content = analysis["content"]
             
-            for analysis in analyses:
-                subcategory = analysis["subcategory"]
-                subcategory_id = analysis["subcategory_id"]
-                content = analysis["content"]
+            # If this content has already been processed (from a batch), skip it
+            content_hash = hash(content)
+            if content_hash in processed_contents:
+                continue
                 
-                # If this content has already been processed (from a batch), skip it
-                content_hash = hash(content)
-                if content_hash in processed_contents:
-                    continue
+            processed_contents.add(content_hash)
+            
+            # For batched responses, try to extract the relevant section
+            extracted_content = extract_subcategory_section(content, subcategory)
+            
+            # If we can't extract a specific section (legacy mode or single-subcategory response)
+            # or if the extracted content is empty, use the full content
+            if not extracted_content:
+                parts.append(f"#### {subcategory}\n\n{content}\n\n---\n\n")
+            else:
+                # For each analysis that shares this content, extract and add its section
+                for shared_analysis in [a for a in analyses if hash(a["content"]) == content_hash]:
+                    shared_subcategory = shared_analysis["subcategory"]
+                    section_content = extract_subcategory_section(content, shared_subcategory)
                     
-                processed_contents.add(content_hash)
-                
-                # For batched responses, try to extract the relevant section
-                extracted_content = extract_subcategory_section(content, subcategory)
-                
-                # If we can't extract a specific section (legacy mode or single-subcategory response)
-                # or if the extracted content is empty, use the full content
-                if not extracted_content:
-                    markdown += f"#### {subcategory}\n\n"
-                    markdown += f"{content}\n\n"
-                    markdown += "---\n\n"
-                else:
-                    # For each analysis that shares this content, extract and add its section
-                    for shared_analysis in [a for a in analyses if hash(a["content"]) == content_hash]:
-                        shared_subcategory = shared_analysis["subcategory"]
-                        section_content = extract_subcategory_section(content, shared_subcategory)
-                        
-                        if section_content:
-                            markdown += f"#### {shared_subcategory}\n\n"
-                            markdown += f"{section_content}\n\n"
-                            markdown += "---\n\n"
+                    if section_content:
+                        parts.append(f"#### {shared_subcategory}\n\n{section_content}\n\n---\n\n")
     
-    return markdown
+    # Join once instead of growing a string with += for every section
+    return "".join(parts)
 
 def extract_subcategory_section(content, subcategory_name):
     """
@@ -1017,19 +1964,39 @@ def save_results(results, output_file):
     Save scan results to a file.
     
     Args:
-        results (list): Results of the scan
+        results (iterable): Results of the scan; consumed lazily
         output_file (str): Path to the output file
         
     Returns:
         bool: True if successful, False otherwise
     """
     try:
-        # Format results as Markdown
-        markdown = format_results_markdown(results)
-        
-        # Write to file
-        with open(output_file, 'w', encoding='utf-8') as file:
-            file.write(markdown)
+        # Write each file's Markdown section as soon as its result is available into a
+        # large buffer. A timer flushes it SAVE_FLUSH_INTERVAL after the first unflushed
+        # section, so partial reports become visible while a slow scan is still waiting for
+        # the next result, without a syscall per section
+        with open(output_file, 'wb', buffering=SAVE_BUFFER_SIZE) as file:
+            lock = threading.Lock()
+            timer = None
+            
+            def flush():
+                with lock:
+                    if not file.closed:
+                        file.flush()
+            
+            try:
+                for section in iter_results_markdown(results):
+                    with lock:
+                        file.write(section.encode('utf-8'))
+                    if timer is None or not timer.is_alive():
+                        timer = threading.Timer(SAVE_FLUSH_INTERVAL, flush)
+                        timer.daemon = True
+                        timer.start()
+            finally:
+                # The file is flushed on close; make sure no timer touches it afterwards
+                if timer is not None:
+                    timer.cancel()
+                    timer.join()
         
         logger.info(f"Results saved to {output_file}")
         return True
@@ -1104,38 +2071,26 @@ def generate_prompt(file_path, content, language, prompts):
     """
     file_name = os.path.basename(file_path)
     
-    # Create the intro section
-    intro = f"""Analyze the following {language.upper()} code from '{file_name}'.
-
-CODE:
-```{language}
-{content}
-```
-
-REQUESTED ANALYSIS: 
-"""
+    # The role lives in SYSTEM_PROMPT; each analysis is listed once under the heading the
+    # response must use, and the code goes last so requests for the same analyses share
+    # the longest possible prompt prefix
+    parts = ["Provide a separate section for each requested analysis, starting with its heading exactly as shown.\n"]
     
-    # Add each analysis request
     for i, prompt_config in enumerate(prompts):
-        category = prompt_config["category"]
         subcategory = prompt_config["subcategory"]
-        prompt_template = prompt_config.get("prompt_template", f"Analyze the code for {subcategory} issues.")
+        prompt_template = prompt_config.get("prompt_template") or f"Analyze the code for {subcategory} issues."
         
-        intro += f"\n{i+1}. {category.upper()}: {subcategory} - {prompt_template}\n"
-    
-    # Instructions for the output format
-    intro += "\nPlease provide separate analysis sections for each requested analysis, formatted as follows:\n"
-    
-    for i, prompt_config in enumerate(prompts):
-        intro += f"\n## ANALYSIS {i+1}: {prompt_config['category'].upper()}: {prompt_config['subcategory']}\n"
+        parts.append(f"\n## ANALYSIS {i+1}: {prompt_config['category'].upper()}: {subcategory}\n{prompt_template}\n")
         
         if prompt_config.get("output_format"):
-            intro += f"Output format: {prompt_config['output_format']}\n"
+            parts.append(f"Output format: {prompt_config['output_format']}\n")
         
         if prompt_config.get("example_fix"):
-            intro += f"Example fix: {prompt_config['example_fix']}\n"
+            parts.append(f"Example fix: {prompt_config['example_fix']}\n")
     
-    return intro
+    parts.append(f"\n{language.upper()} CODE from '{file_name}':\n```{language}\n{content}\n```\n")
+    
+    return "".join(parts)
 
 def parse_batch_response(response_text, prompts):
     """
@@ -1221,35 +2176,33 @@ def format_results(result, output_file):
         logger.warning("No results to format")
         return
     
-    # Create a markdown string
-    markdown = "# Code Scan Results\n\n"
+    # Collect the markdown pieces and write them out in one go
+    parts = ["# Code Scan Results\n\n"]
     
     # Add summary
     file_path = result.get("file_path", "Unknown file")
     language = result.get("language", "Unknown language")
     analysis_count = len(result.get("analyses", []))
     
-    markdown += f"## Summary\n\n"
-    markdown += f"- **File:** {file_path}\n"
-    markdown += f"- **Language:** {language.capitalize()}\n"
-    markdown += f"- **Analysis Count:** {analysis_count}\n\n"
+    parts.append("## Summary\n\n")
+    parts.append(f"- **File:** {file_path}\n")
+    parts.append(f"- **Language:** {language.capitalize()}\n")
+    parts.append(f"- **Analysis Count:** {analysis_count}\n\n")
     
     # Add each analysis
-    markdown += "## Analysis Results\n\n"
+    parts.append("## Analysis Results\n\n")
     
     for i, analysis in enumerate(result.get("analyses", [])):
         category = analysis.get("category", "Unknown")
         subcategory = analysis.get("subcategory", "Unknown")
         content = analysis.get("content", "No content")
         
-        markdown += f"### {i+1}. {category.capitalize()}: {subcategory}\n\n"
-        markdown += f"{content}\n\n"
-        markdown += "---\n\n"
+        parts.append(f"### {i+1}. {category.capitalize()}: {subcategory}\n\n{content}\n\n---\n\n")
     
     # Write to file
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(markdown)
+            f.write("".join(parts))
         logger.info(f"Results saved to {output_file}")
     except Exception as e:
         logger.error(f"Error writing results to {output_file}: {e}")
@@ -1259,12 +2212,25 @@ def main():
     parser = argparse.ArgumentParser(description="Scan code for security and performance issues using AI.")
     parser.add_argument("path", help="Path to the file or directory to scan")
     parser.add_argument("-o", "--output", help="Path to the output file (default: output.md)", default="output.md")
+    parser.add_argument("--config", help="Path to the YAML configuration file (default: %(default)s)",
+                      default="config.yaml")
     parser.add_argument("-r", "--repository", help="Path to the prompts repository file", 
                       default="prompts_repository.json")
     parser.add_argument("-c", "--categories", help="Categories to scan (comma-separated, default: all)",
                       default="")
     parser.add_argument("-s", "--subcategories", help="Subcategories to scan (comma-separated, default: all)",
                       default="")
+    parser.add_argument("--files-per-batch", help="Maximum number of files combined into one API call (default: %(default)s)",
+                      type=int, default=3)
+    parser.add_argument("--max-tokens", help="Maximum tokens per API call when batching files (default: %(default)s)",
+                      type=int, default=6000)
+    parser.add_argument("-j", "--max-workers", help="Number of files to analyze concurrently (default: %(default)s)",
+                      type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--no-prefilter", help="Send every file to the API even when static rules find nothing to analyze",
+                      action="store_true")
+    parser.add_argument("--cache-file", help="Path to the API response cache (default: %(default)s)",
+                      default=DEFAULT_CACHE_FILE)
+    parser.add_argument("--no-cache", help="Disable the API response cache", action="store_true")
     parser.add_argument("-v", "--verbose", help="Enable verbose logging", action="store_true")
     
     args = parser.parse_args()
@@ -1275,6 +2241,13 @@ def main():
     else:
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     
+    # Scanning exclusions and the minimum file size from the config file, if there is one
+    config = load_config(args.config) if os.path.exists(args.config) else {}
+    min_size = ((config or {}).get('scanning') or {}).get('min_size', MIN_SCAN_SIZE)
+    
+    # Reuse responses from previous runs for unchanged prompts
+    configure_response_cache(None if args.no_cache else args.cache_file)
+    
     # Set up the prompts repository
     repository_path = args.repository
     repository = load_prompt_repository(repository_path)
@@ -1288,25 +2261,34 @@ def main():
     subcategories = [s for s in subcategories if s]
     
     if os.path.isfile(args.path):
-        # Single file scanning
+        # Single file scanning: call scan_file directly, with its plain open/read, rather
+        # than going through the directory pipeline's thread pool and batching, which
+        # only pay off across many files
         result = scan_file(
             file_path=args.path,
             repository=repository,
             categories=categories,
-            subcategories=subcategories
+            subcategories=subcategories,
+            min_size=min_size,
+            prefilter=not args.no_prefilter
         )
         format_results(result, args.output)
         return 0
     elif os.path.isdir(args.path):
-        # Directory scanning
-        result = scan_directory(
+        # Directory scanning, streaming each file's result into the report
+        results = iter_scan_directory(
             directory_path=args.path,
             repository=repository,
             categories=categories,
-            subcategories=subcategories
+            subcategories=subcategories,
+            ignore_patterns=get_config_ignore_patterns(config),
+            files_per_batch=args.files_per_batch,
+            max_tokens=args.max_tokens,
+            max_workers=args.max_workers,
+            prefilter=not args.no_prefilter,
+            min_size=min_size
         )
-        format_results(result, args.output)
-        return 0
+        return 0 if save_results(results, args.output) else 1
     else:
         logger.error(f"Path not found: {args.path}")
         return 1
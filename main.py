@@ -48,6 +48,11 @@ def parse_arguments():
         nargs="+",
         help="Specific vulnerability categories to scan for"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the API instead of reusing cached responses"
+    )
     return parser.parse_args()
 
 def main():
@@ -56,6 +61,8 @@ def main():
     
     # Load configuration
     config = load_config(args.config)
+    if args.no_cache:
+        config["use_cache"] = False
     
     # Initialize the code analyzer
     analyzer = CodeAnalyzer(config)
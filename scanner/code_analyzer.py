@@ -7,16 +7,191 @@ for security vulnerabilities and performance issues using Cerebras-hosted Llama
 import os
 import re
 import json
+import random
+import heapq
+import hashlib
+import asyncio
+import itertools
+from collections import Counter
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Union
 import logging
 
-from cerebras.cloud.sdk import CerebrasCloudSDK
 from scanner.prompt_manager import PromptManager
-from scanner.utils import chunk_code, get_file_language
+from scanner.response_cache import ResponseCache, DEFAULT_CACHE_TTL
+from scanner.utils import chunk_code, get_file_language, iter_source_files, normalize_code
 
 logger = logging.getLogger(__name__)
 
+# Default maximum number of Cerebras API calls in flight at once
+DEFAULT_CONCURRENCY = 16
+# Default number of files read ahead of the analysis
+DEFAULT_PREFETCH = 32
+# Worker threads kept free for file reads next to the ones making API calls
+READ_THREADS = 4
+
+# HTTP status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# Default number of retries of a failed API call, and the backoff bounds in seconds
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_RETRY_BASE_DELAY = 1.0
+DEFAULT_RETRY_MAX_DELAY = 30.0
+
+# API call schedules: "by_category" sends queued prompts of the same template back to
+# back so the server can reuse its cached prompt prefix; "fifo" sends them in file order
+SCHEDULES = ("by_category", "fifo")
+
+# One markdown bullet point of a model response
+_BULLET_RE = re.compile(r'\s*[-*]\s+(.+?)(?=\s*[-*]\s+|$)', re.DOTALL)
+# A response wrapped in a markdown code fence
+_CODE_FENCE_RE = re.compile(r'^```(?:json)?\s*(.*?)\s*```$', re.DOTALL)
+
+class _PrioritySemaphore:
+    """Semaphore that wakes waiters in priority order rather than arrival order.
+    
+    Waiters with equal priority are woken in arrival order.
+    """
+    
+    def __init__(self, value: int):
+        """Initialize the semaphore.
+        
+        Args:
+            value: The number of holders allowed at once.
+        """
+        self._value = value
+        self._waiters = []
+        self._counter = itertools.count()
+    
+    @asynccontextmanager
+    async def slot(self, priority: tuple = ()):
+        """Hold the semaphore for the duration of a with block.
+        
+        Args:
+            priority: Sort key of the waiter; lower keys are woken first.
+        """
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    async def acquire(self, priority: tuple = ()) -> None:
+        """Acquire the semaphore, waiting behind holders with a lower priority key.
+        
+        Args:
+            priority: Sort key of the waiter; lower keys are woken first.
+        """
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Pass on a slot that was handed over just as the waiter was cancelled
+            if not waiter.cancelled():
+                self.release()
+            raise
+    
+    def release(self) -> None:
+        """Release the semaphore, handing it to the first waiter still waiting."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._value += 1
+
+def _parse_json_response(response: str) -> Optional[List[Dict[str, Any]]]:
+    """Parse a response in the JSON format requested by prompt_manager.PROMPT_SUFFIX.
+    
+    Args:
+        response: The model's response text.
+        
+    Returns:
+        The issue objects, or None if the response is not a JSON list of issues.
+    """
+    text = response.strip()
+    fenced = _CODE_FENCE_RE.match(text)
+    if fenced:
+        text = fenced.group(1)
+    if not text.startswith(("[", "{")):
+        return None
+    
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    
+    # Accept {"issues": [...]} as well as a bare array
+    if isinstance(data, dict):
+        data = data.get("issues")
+    if not isinstance(data, list):
+        return None
+    return [item for item in data if isinstance(item, dict)]
+
+def _parse_response_worker(response: str, category: str, subcategory: str,
+                           file_path: str, chunk_index: int) -> List[Dict[str, Any]]:
+    """Extract the issues listed in a model's response.
+    
+    This is a module-level function so it can be pickled and run in a worker process.
+    
+    Args:
+        response: The model's response text.
+        category: The vulnerability category.
+        subcategory: The vulnerability subcategory.
+        file_path: Path to the file being analyzed.
+        chunk_index: Index of the chunk in the file.
+        
+    Returns:
+        A list of issues extracted from the response.
+    """
+    # Structured output first; fall back to markdown bullets for free-form responses
+    json_issues = _parse_json_response(response)
+    if json_issues is not None:
+        return [
+            {
+                "category": category,
+                "subcategory": subcategory,
+                "description": str(item.get("description", "")).strip(),
+                "severity": item.get("severity"),
+                "line_hint": item.get("line_hint"),
+                "file_path": file_path,
+                "chunk_index": chunk_index
+            }
+            for item in json_issues
+            if str(item.get("description", "")).strip()
+        ]
+    
+    issues = []
+    
+    # Skip if the response indicates no issues (a single lowercase pass)
+    folded = response.casefold()
+    if folded.find("no issues") != -1 or folded.find("no vulnerabilities") != -1:
+        return issues
+    
+    # Extract bullet points from markdown response as they are matched
+    for match in _BULLET_RE.finditer(response):
+        description = match.group(1).strip()
+        
+        # Skip empty bullets
+        if not description:
+            continue
+            
+        issues.append({
+            "category": category,
+            "subcategory": subcategory,
+            "description": description,
+            "file_path": file_path,
+            "chunk_index": chunk_index
+        })
+    
+    return issues
+
 class CodeAnalyzer:
     """Analyzes code for security vulnerabilities and performance issues.
     
@@ -32,21 +207,147 @@ class CodeAnalyzer:
             config: Configuration dictionary containing API keys and settings.
         """
         self.config = config
-        self.prompt_manager = PromptManager(config.get("prompts_file", "docs/proprompts.json"))
+        self.model_name = config.get("model_name", "llama-4")
+        self.prompt_manager = PromptManager(config.get("prompts_file", "docs/proprompts.json"),
+                                            model_name=self.model_name)
         
         # Initialize Cerebras SDK
         api_key = config.get("cerebras_api_key") or os.environ.get("CEREBRAS_API_KEY")
         if not api_key:
             raise ValueError("Cerebras API key not found. Please set it in the config file or as an environment variable.")
         
+        # Imported here so report-only runs and --help do not load the SDK and its HTTP stack
+        from cerebras.cloud.sdk import CerebrasCloudSDK
         self.cerebras_sdk = CerebrasCloudSDK(api_key=api_key)
-        self.model_name = config.get("model_name", "llama-4")
+        self.concurrency = max(1, int(config.get("concurrency", DEFAULT_CONCURRENCY)))
+        self.prefetch = max(1, int(config.get("prefetch", DEFAULT_PREFETCH)))
+        self.max_retries = max(0, int(config.get("max_retries", DEFAULT_MAX_RETRIES)))
+        self.retry_base_delay = float(config.get("retry_base_delay", DEFAULT_RETRY_BASE_DELAY))
+        self.retry_max_delay = float(config.get("retry_max_delay", DEFAULT_RETRY_MAX_DELAY))
+        self.parse_workers = max(0, int(config.get("parse_workers", 0)))
+        self.schedule = config.get("schedule", "by_category")
+        if self.schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule {self.schedule!r}; expected one of {', '.join(SCHEDULES)}")
+        
+        # Responses to identical requests are reused across runs unless disabled
+        self.cache = None
+        self.manifest_path = None
+        if config.get("use_cache", True):
+            cache_dir = config.get("cache_dir", ".scanner_cache")
+            self.cache = ResponseCache(cache_dir, ttl=config.get("cache_ttl", DEFAULT_CACHE_TTL))
+            # Files unchanged since the last scan reuse their issues without being re-analyzed
+            if config.get("use_manifest", True):
+                self.manifest_path = Path(cache_dir) / "manifest.json"
+        
+        # Responses (or the in-flight task producing them) keyed by (category, subcategory,
+        # normalized chunk), so chunks that only differ in comments or formatting are analyzed
+        # once per scan; reset by each run, as the response cache covers reuse across runs
+        self.normalized_cache = {} if config.get("normalized_cache", True) else None
+        
+        # Model responses of the current scan that issues refer to by response_id
+        self._responses = {}
+        
+        # API call task per prompt digest for the current run, so identical prompts are sent once
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        
+        # Files of the current scan with a failed prompt, whose issues must not be reused
+        self._failed_files = set()
+        
+        # Worker processes parsing responses during a scan when parse_workers is set
+        self._cpu = None
         
         logger.info(f"CodeAnalyzer initialized with model: {self.model_name}")
     
     def scan_codebase(self, path: Union[str, Path], categories: Optional[List[str]] = None) -> Dict[str, Any]:
         """Scan a codebase for security vulnerabilities and performance issues.
         
+        Args:
+            path: Path to the file or directory to scan.
+            categories: Optional list of specific vulnerability categories to scan for.
+            
+        Returns:
+            A dictionary containing the scan results.
+            
+        Raises:
+            RuntimeError: If called from a running event loop; use ascan_codebase there.
+        """
+        return self._run(self._ascan_codebase(path, categories))
+    
+    async def ascan_codebase(self, path: Union[str, Path], categories: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Scan a codebase from inside a running event loop (e.g. Jupyter or an async app).
+        
+        Blocking work runs on the caller's default executor, which is left as is. Do not run
+        several scans on the same analyzer concurrently.
+        
+        Args:
+            path: Path to the file or directory to scan.
+            categories: Optional list of specific vulnerability categories to scan for.
+            
+        Returns:
+            A dictionary containing the scan results.
+        """
+        return await self._scoped(self._ascan_codebase(path, categories))
+    
+    def _run(self, coro):
+        """Run a coroutine on a fresh event loop with enough worker threads for the scan.
+        
+        Args:
+            coro: The coroutine to run.
+            
+        Returns:
+            The coroutine's result.
+            
+        Raises:
+            RuntimeError: If called while an event loop is running in this thread; await
+                ascan_codebase or ascan_file there instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError(
+                "scan_codebase and scan_file cannot be called from a running event loop; "
+                "await ascan_codebase or ascan_file instead"
+            )
+        
+        async def main():
+            # Blocking SDK calls and file reads run on the default executor; size it so the
+            # semaphore is the limit and reads never wait behind API calls
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=self.concurrency + READ_THREADS)
+            )
+            return await self._scoped(coro)
+        
+        return asyncio.run(main())
+    
+    async def _scoped(self, coro):
+        """Await a scan coroutine with the per-run state it needs.
+        
+        Args:
+            coro: The coroutine to await.
+            
+        Returns:
+            The coroutine's result.
+        """
+        # Tasks are bound to their event loop, so each run starts new registries
+        self._inflight = {}
+        if self.normalized_cache is not None:
+            self.normalized_cache = {}
+        if self.parse_workers:
+            from concurrent.futures import ProcessPoolExecutor
+            self._cpu = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            return await coro
+        finally:
+            if self._cpu is not None:
+                cpu, self._cpu = self._cpu, None
+                await asyncio.to_thread(cpu.shutdown)
+    
+    async def _ascan_codebase(self, path: Union[str, Path], categories: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Scan a codebase with files read ahead and all chunks and prompts analyzed concurrently.
+        
         Args:
             path: Path to the file or directory to scan.
             categories: Optional list of specific vulnerability categories to scan for.
@@ -55,8 +356,13 @@ class CodeAnalyzer:
             A dictionary containing the scan results.
         """
         path = Path(path)
+        # Bounds the number of API calls in flight across the whole scan
+        semaphore = _PrioritySemaphore(self.concurrency)
+        self._responses = {}
+        self._failed_files = set()
         results = {
             "issues": [],
+            "responses": self._responses,
             "stats": {
                 "files_scanned": 0,
                 "total_issues": 0,
@@ -66,33 +372,184 @@ class CodeAnalyzer:
         
         if path.is_file():
             # Scan a single file
-            file_results = self.scan_file(path, categories)
-            results["issues"].extend(file_results)
-            results["stats"]["files_scanned"] = 1
+            all_file_results = [await self._ascan_file(path, categories, semaphore)]
         elif path.is_dir():
             # Scan all Python and SQL files in the directory
-            for pattern in ["**/*.py", "**/*.sql"]:
-                for file_path in path.glob(pattern):
-                    logger.info(f"Scanning file: {file_path}")
-                    file_results = self.scan_file(file_path, categories)
-                    results["issues"].extend(file_results)
-                    results["stats"]["files_scanned"] += 1
+            file_paths = [Path(file_path) for file_path in iter_source_files(path)]
+            all_file_results = await self._ascan_files(file_paths, categories, semaphore)
         else:
             logger.error(f"Invalid path: {path}")
             return results
         
+        # Collect issues and count them by category in a single pass
+        category_counts = Counter()
+        for file_results in all_file_results:
+            results["issues"].extend(file_results)
+            category_counts.update(issue["category"] for issue in file_results)
+            results["stats"]["files_scanned"] += 1
+        
         # Update statistics
         results["stats"]["total_issues"] = len(results["issues"])
-        
-        # Count issues by category
-        for issue in results["issues"]:
-            category = issue["category"]
-            if category not in results["stats"]["categories"]:
-                results["stats"]["categories"][category] = 0
-            results["stats"]["categories"][category] += 1
+        results["stats"]["categories"] = dict(category_counts)
         
         return results
     
+    async def _ascan_files(self, file_paths: List[Path], categories: Optional[List[str]],
+                           semaphore: _PrioritySemaphore) -> List[List[Dict[str, Any]]]:
+        """Scan files with a reader prefetching their contents into a bounded queue.
+        
+        A producer reads files on worker threads, up to self.prefetch files ahead, while
+        consumers analyze the files already read, so disk reads overlap the API calls.
+        Files whose manifest entry is still valid reuse its issues and are not queued.
+        
+        Args:
+            file_paths: Paths of the files to scan.
+            categories: Optional list of specific vulnerability categories to scan for.
+            semaphore: Semaphore bounding the number of API calls in flight.
+            
+        Returns:
+            The issues found in each file, in the order of file_paths.
+        """
+        file_results = [[] for _ in file_paths]
+        queue = asyncio.Queue(maxsize=self.prefetch)
+        consumer_count = min(self.concurrency, len(file_paths)) or 1
+        
+        manifest = None
+        if self.manifest_path is not None:
+            manifest = await asyncio.to_thread(self._load_manifest, self._manifest_signature(categories))
+        
+        async def produce():
+            for index, file_path in enumerate(file_paths):
+                entry = manifest.get(str(file_path)) if manifest is not None else None
+                try:
+                    stamp, code, digest = await asyncio.to_thread(
+                        self._read_if_changed, file_path, entry, manifest is not None
+                    )
+                except Exception as e:
+                    logger.error(f"Error scanning file {file_path}: {str(e)}")
+                    continue
+                
+                if code is None:
+                    logger.info(f"Skipping unchanged file: {file_path}")
+                    entry["stamp"] = stamp
+                    file_results[index] = entry["issues"]
+                    self._responses.update(entry["responses"])
+                    continue
+                await queue.put((index, file_path, code, stamp, digest))
+            for _ in range(consumer_count):
+                await queue.put(None)
+        
+        async def consume():
+            while (item := await queue.get()) is not None:
+                index, file_path, code, stamp, digest = item
+                file_results[index] = await self._ascan_file(file_path, categories, semaphore, code=code)
+                if manifest is not None and str(file_path) not in self._failed_files:
+                    manifest[str(file_path)] = {
+                        "stamp": stamp,
+                        "hash": digest,
+                        "issues": file_results[index],
+                        "responses": {
+                            issue["response_id"]: self._responses[issue["response_id"]]
+                            for issue in file_results[index]
+                        }
+                    }
+        
+        await asyncio.gather(produce(), *(consume() for _ in range(consumer_count)))
+        
+        if manifest is not None:
+            # Keep only the files of this scan, so deleted or renamed files do not pile up
+            scanned = {str(file_path) for file_path in file_paths}
+            manifest = {path: entry for path, entry in manifest.items() if path in scanned}
+            await asyncio.to_thread(self._save_manifest, self._manifest_signature(categories), manifest)
+        return file_results
+    
+    @staticmethod
+    def _read_if_changed(file_path: Path, entry: Optional[Dict[str, Any]],
+                         hash_content: bool) -> Tuple[List[int], Optional[str], Optional[str]]:
+        """Read a file unless its manifest entry shows it is unchanged.
+        
+        The file's (mtime_ns, size) is compared with the entry first; only when it differs
+        is the content read and its hash compared.
+        
+        Args:
+            file_path: Path to the file.
+            entry: The file's manifest entry, if any.
+            hash_content: Hash the content so a manifest entry can be recorded.
+            
+        Returns:
+            A (stamp, code, digest) tuple, where code is None if the entry is still valid.
+        """
+        st = os.stat(file_path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        if entry is not None and entry["stamp"] == stamp:
+            return stamp, None, entry["hash"]
+        
+        data = Path(file_path).read_bytes()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest() if hash_content else None
+        if entry is not None and entry["hash"] == digest:
+            return stamp, None, digest
+        
+        # Same newline handling as Path.read_text
+        code = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        return stamp, code, digest
+    
+    def _manifest_signature(self, categories: Optional[List[str]]) -> str:
+        """Fingerprint everything besides file content that a file's issues depend on.
+        
+        Args:
+            categories: The categories being scanned for.
+            
+        Returns:
+            A hex digest of the model settings, categories and prompt templates.
+        """
+        parts = [
+            self.model_name,
+            str(self.config.get("temperature", 0.2)),
+            str(self.config.get("top_p", 0.95)),
+            str(self.config.get("max_chunk_tokens", 4000)),
+            "|".join(sorted(categories)) if categories else "*",
+        ]
+        parts.extend(prompt["prompt_prefix"] for prompt in self.prompt_manager.prompts)
+        return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _load_manifest(self, signature: str) -> Dict[str, Dict[str, Any]]:
+        """Load the manifest of previously scanned files.
+        
+        Args:
+            signature: The current manifest signature; a manifest written with another
+                one (different model, categories or prompts) is ignored.
+            
+        Returns:
+            Manifest entries keyed by file path.
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable manifest {self.manifest_path}: {str(e)}")
+            return {}
+        
+        if data.get("signature") != signature:
+            return {}
+        return data.get("files", {})
+    
+    def _save_manifest(self, signature: str, files: Dict[str, Dict[str, Any]]) -> None:
+        """Write the manifest atomically.
+        
+        Args:
+            signature: The manifest signature.
+            files: Manifest entries keyed by file path.
+        """
+        tmp_path = self.manifest_path.with_name(f"{self.manifest_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"signature": signature, "files": files}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.manifest_path)
+        except Exception as e:
+            logger.warning(f"Could not save manifest {self.manifest_path}: {str(e)}")
+    
     def scan_file(self, file_path: Path, categories: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Scan a single file for security vulnerabilities and performance issues.
         
@@ -100,14 +557,45 @@ class CodeAnalyzer:
             file_path: Path to the file to scan.
             categories: Optional list of specific vulnerability categories to scan for.
             
+        Returns:
+            A list of issues found in the file.
+            
+        Raises:
+            RuntimeError: If called from a running event loop; use ascan_file there.
+        """
+        return self._run(self._ascan_file(file_path, categories, _PrioritySemaphore(self.concurrency)))
+    
+    async def ascan_file(self, file_path: Path, categories: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Scan a single file from inside a running event loop.
+        
+        Args:
+            file_path: Path to the file to scan.
+            categories: Optional list of specific vulnerability categories to scan for.
+            
+        Returns:
+            A list of issues found in the file.
+        """
+        return await self._scoped(self._ascan_file(file_path, categories, _PrioritySemaphore(self.concurrency)))
+    
+    async def _ascan_file(self, file_path: Path, categories: Optional[List[str]],
+                          semaphore: _PrioritySemaphore, code: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Scan a single file, analyzing all of its chunks concurrently.
+        
+        Args:
+            file_path: Path to the file to scan.
+            categories: Optional list of specific vulnerability categories to scan for.
+            semaphore: Semaphore bounding the number of API calls in flight.
+            code: Content of the file if already read; read on a worker thread otherwise.
+            
         Returns:
             A list of issues found in the file.
         """
         issues = []
+        logger.info(f"Scanning file: {file_path}")
         
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                code = f.read()
+            if code is None:
+                code = await asyncio.to_thread(Path(file_path).read_text, encoding="utf-8")
             
             language = get_file_language(file_path)
             if language not in ["Python", "SQL"]:
@@ -120,54 +608,179 @@ class CodeAnalyzer:
                 logger.warning(f"No prompts found for language: {language}")
                 return issues
             
-            # Split code into manageable chunks if it's too large
-            code_chunks = chunk_code(code, max_tokens=self.config.get("max_chunk_tokens", 4000))
+            # Split code into manageable chunks if it's too large, leaving room in each
+            # request for the longest prompt wrapped around the chunk
+            reserve = self.prompt_manager.get_max_prompt_tokens(language, categories)
+            code_chunks = chunk_code(code, max_tokens=self.config.get("max_chunk_tokens", 4000),
+                                     model_name=self.model_name, reserve=reserve)
             
             # Process each chunk with each relevant prompt
-            for i, chunk in enumerate(code_chunks):
-                chunk_issues = self._process_code_chunk(chunk, prompts, file_path, chunk_index=i)
+            all_chunk_issues = await asyncio.gather(
+                *(self._process_code_chunk(chunk, prompts, file_path, semaphore, chunk_index=i)
+                  for i, chunk in enumerate(code_chunks))
+            )
+            for chunk_issues in all_chunk_issues:
                 issues.extend(chunk_issues)
         
         except Exception as e:
             logger.error(f"Error scanning file {file_path}: {str(e)}")
+            self._failed_files.add(str(file_path))
         
         return issues
     
-    def _process_code_chunk(self, code: str, prompts: List[Dict[str, Any]], 
-                           file_path: Path, chunk_index: int = 0) -> List[Dict[str, Any]]:
-        """Process a chunk of code with multiple prompts.
+    async def _process_code_chunk(self, code: str, prompts: List[Dict[str, Any]], file_path: Path,
+                                  semaphore: _PrioritySemaphore, chunk_index: int = 0) -> List[Dict[str, Any]]:
+        """Process a chunk of code with multiple prompts concurrently.
         
         Args:
             code: The code chunk to analyze.
             prompts: List of prompt templates to use.
             file_path: Path to the file being analyzed.
+            semaphore: Semaphore bounding the number of API calls in flight.
             chunk_index: Index of the chunk in the file.
             
         Returns:
             A list of issues found in the code chunk.
         """
-        issues = []
+        normalized_code = None
+        if self.normalized_cache is not None and prompts:
+            normalized_code = normalize_code(code, prompts[0]["language"])
+        
+        async def call(prompt_template: Dict[str, Any]) -> str:
+            # Create the 2nd-layer prompt by appending the code to the template's shared prefix
+            prompt = f"{prompt_template['prompt_prefix']}{code}\n```"
+            priority = ()
+            if self.schedule == "by_category":
+                # Group prompts sharing a prefix, with the largest last in each group
+                priority = (prompt_template["category"], prompt_template["subcategory"], len(code))
+            if normalized_code is None:
+                return await self._dispatch(prompt, semaphore, priority)
+            
+            cache_key = (prompt_template["category"], prompt_template["subcategory"], normalized_code)
+            cached = self.normalized_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Reusing response for {file_path} chunk {chunk_index} "
+                            f"({prompt_template['category']}/{prompt_template['subcategory']})")
+                return cached if isinstance(cached, str) else await cached
+            
+            task = asyncio.ensure_future(self._dispatch(prompt, semaphore, priority))
+            self.normalized_cache[cache_key] = task
+            task.add_done_callback(lambda done: self._settle_normalized_cache(cache_key, done))
+            return await task
         
-        for prompt_template in prompts:
+        tasks = [asyncio.create_task(call(prompt_template)) for prompt_template in prompts]
+        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        issues = []
+        for prompt_template, response in zip(prompts, responses):
             category = prompt_template["category"]
             subcategory = prompt_template["subcategory"]
             
-            # Create the 2nd-layer prompt by inserting the code
-            prompt = f"{prompt_template['prompt_template']}\n\nCode:\n```{prompt_template['language'].lower()}\n{code}\n```"
+            if isinstance(response, Exception):
+                logger.error(f"Error processing prompt {category}/{subcategory}: {str(response)}")
+                self._failed_files.add(str(file_path))
+                continue
             
-            # Call Cerebras API with the prompt
+            # Parse the response to extract issues
             try:
-                response = self._call_cerebras_api(prompt)
-                
-                # Parse the response to extract issues
-                parsed_issues = self._parse_response(response, category, subcategory, file_path, chunk_index)
-                issues.extend(parsed_issues)
-                
+                issues.extend(await self._parse_response(response, category, subcategory, file_path, chunk_index))
             except Exception as e:
                 logger.error(f"Error processing prompt {category}/{subcategory}: {str(e)}")
+                self._failed_files.add(str(file_path))
         
         return issues
     
+    async def _dispatch(self, prompt: str, semaphore: _PrioritySemaphore, priority: tuple = ()) -> str:
+        """Send a prompt, sharing one API call between all identical prompts of the run.
+        
+        The first caller of a prompt starts the call; later callers with a byte-identical
+        prompt (the same template and chunk) await the same task. Failed calls are dropped
+        from the registry so a later caller can try again.
+        
+        Args:
+            prompt: The prompt to send to the model.
+            semaphore: Semaphore bounding the number of API calls in flight.
+            priority: Position of the call among those waiting for the semaphore.
+            
+        Returns:
+            The model's response as a string.
+        """
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest()
+        task = self._inflight.get(key)
+        if task is None:
+            async def send() -> str:
+                async with semaphore.slot(priority):
+                    return await self._acall_cerebras_api(prompt)
+            
+            task = asyncio.ensure_future(send())
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda done: self._inflight.pop(key, None) if done.cancelled() or done.exception() else None
+            )
+        else:
+            logger.debug("Sharing API call with an identical prompt")
+        
+        # Shield the shared call so one caller being cancelled does not cancel it for the others
+        return await asyncio.shield(task)
+    
+    def _settle_normalized_cache(self, cache_key: tuple, task: asyncio.Future) -> None:
+        """Replace a finished task in the normalized cache with its response, or drop it if it failed.
+        
+        Args:
+            cache_key: The cache key the task was stored under.
+            task: The finished task.
+        """
+        if task.cancelled() or task.exception() is not None:
+            self.normalized_cache.pop(cache_key, None)
+        else:
+            self.normalized_cache[cache_key] = task.result()
+    
+    async def _acall_cerebras_api(self, prompt: str) -> str:
+        """Call the Cerebras API without blocking the event loop.
+        
+        The SDK call runs in a worker thread so many requests can be in flight at once.
+        Rate limiting and transient failures are retried with exponential backoff and
+        full jitter; the wait happens on the event loop, not in a worker thread.
+        
+        Args:
+            prompt: The prompt to send to the model.
+            
+        Returns:
+            The model's response as a string.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(self._call_cerebras_api, prompt)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+                logger.warning(f"Retrying Cerebras API call in {delay:.1f}s "
+                               f"(attempt {attempt + 2}/{self.max_retries + 1}): {str(e)}")
+                await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Check if a failed API call is worth retrying.
+        
+        Args:
+            error: The exception raised by the SDK.
+            
+        Returns:
+            True for rate limiting, transient server errors, timeouts and connection errors.
+        """
+        status_code = getattr(error, "status_code", None)
+        if status_code is None:
+            status_code = getattr(getattr(error, "response", None), "status_code", None)
+        if status_code is not None:
+            return status_code in RETRYABLE_STATUS_CODES
+        
+        # SDK transport errors do not share a base class; go by the exception type
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return True
+        name = type(error).__name__
+        return "Timeout" in name or "Connection" in name or "RateLimit" in name
+    
     def _call_cerebras_api(self, prompt: str) -> str:
         """Call the Cerebras API with a prompt.
         
@@ -177,26 +790,50 @@ class CodeAnalyzer:
         Returns:
             The model's response as a string.
         """
+        max_tokens = self.config.get("max_response_tokens", 2048)
+        temperature = self.config.get("temperature", 0.2)
+        top_p = self.config.get("top_p", 0.95)
+        
+        # Serve identical requests from the cache without calling the API; the cache is an
+        # optimization, so its errors are logged and the API is called as if it missed
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key(self.model_name, temperature, top_p, max_tokens, prompt)
+            try:
+                cached = self.cache.get(cache_key)
+            except Exception as e:
+                logger.warning(f"Error reading response cache: {str(e)}")
+                cached = None
+            if cached is not None:
+                return cached
+        
         try:
             # Call the Cerebras API using the SDK
             response = self.cerebras_sdk.generate(
                 model=self.model_name,
                 prompt=prompt,
-                max_tokens=self.config.get("max_response_tokens", 2048),
-                temperature=self.config.get("temperature", 0.2),
-                top_p=self.config.get("top_p", 0.95),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                top_p=top_p,
             )
             
             # Extract the generated text from the response
-            return response.generated_text
+            text = response.generated_text
             
         except Exception as e:
             logger.error(f"Error calling Cerebras API: {str(e)}")
             raise
+        
+        # A failed cache write must not discard a successful response
+        if self.cache is not None:
+            try:
+                self.cache.set(cache_key, text)
+            except Exception as e:
+                logger.warning(f"Error writing response cache: {str(e)}")
+        return text
     
-    def _parse_response(self, response: str, category: str, subcategory: str, 
-                       file_path: Path, chunk_index: int) -> List[Dict[str, Any]]:
-        """Parse the model's response to extract issues.
+    async def _parse_response(self, response: str, category: str, subcategory: str, 
+                              file_path: Path, chunk_index: int) -> List[Dict[str, Any]]:
+        """Parse the model's response to extract issues, in a worker process if configured.
         
         Args:
             response: The model's response text.
@@ -208,31 +845,17 @@ class CodeAnalyzer:
         Returns:
             A list of issues extracted from the response.
         """
-        issues = []
-        
-        # Skip if the response indicates no issues
-        if "no issues" in response.lower() or "no vulnerabilities" in response.lower():
-            return issues
-        
-        # Extract bullet points from markdown response
-        bullet_pattern = r'\s*[-*]\s+(.+?)(?=\s*[-*]\s+|$)'
-        bullets = re.findall(bullet_pattern, response, re.DOTALL)
+        args = (response, category, subcategory, str(file_path), chunk_index)
+        if self._cpu is not None:
+            issues = await asyncio.get_running_loop().run_in_executor(self._cpu, _parse_response_worker, *args)
+        else:
+            issues = _parse_response_worker(*args)
         
-        for bullet in bullets:
-            # Skip empty bullets
-            if not bullet.strip():
-                continue
-                
-            # Create an issue entry
-            issue = {
-                "category": category,
-                "subcategory": subcategory,
-                "description": bullet.strip(),
-                "file_path": str(file_path),
-                "chunk_index": chunk_index,
-                "raw_response": response
-            }
-            
-            issues.append(issue)
+        # Keep the response once, referenced by id, rather than copying it into every issue
+        if issues:
+            response_id = f"{file_path}#{chunk_index}:{category}/{subcategory}"
+            self._responses[response_id] = response
+            for issue in issues:
+                issue["response_id"] = response_id
         
         return issues
\ No newline at end of file
@@ -6,11 +6,24 @@ prompt templates for different vulnerability categories.
 
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, FrozenSet, List, Optional, Any, Tuple
 import logging
 
+from scanner.utils import count_tokens
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Appended to every prompt template so responses can be parsed with json.loads
+PROMPT_SUFFIX = (
+    "Return ONLY a JSON array of objects with the keys \"description\", \"severity\" "
+    "(high, medium or low) and \"line_hint\". Return [] if there are no issues. No prose."
+)
+
 class PromptManager:
     """Manages prompt templates for different vulnerability categories.
     
@@ -18,22 +31,51 @@ class PromptManager:
     providing appropriate prompts for different languages and vulnerability categories.
     """
     
-    def __init__(self, prompts_file: str):
+    def __init__(self, prompts_file: str, model_name: Optional[str] = None):
         """Initialize the PromptManager.
         
         Args:
             prompts_file: Path to the JSON file containing prompt templates.
+            model_name: The model prompts are sent to, used to count their tokens.
         """
         self.prompts_file = prompts_file
         self.prompts = self._load_prompts()
         
         # Group prompts by language for faster access
         self.prompts_by_language = {}
+        # Index prompts by (language, category, subcategory); the first prompt of each key wins
+        self._by_key: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        categories_by_lang = {}
+        subcategories_by_cat = {}
         for prompt in self.prompts:
             language = prompt["language"]
             if language not in self.prompts_by_language:
                 self.prompts_by_language[language] = []
             self.prompts_by_language[language].append(prompt)
+            
+            # The part of every analysis prompt that comes before the code, shared by all chunks
+            prompt["prompt_prefix"] = (
+                f"{prompt['prompt_template'].strip()}\n{PROMPT_SUFFIX}\n\n"
+                f"Code:\n```{language.lower()}\n"
+            )
+            # Tokens of the prompt around the code: the prefix and the closing code fence
+            prompt["prompt_tokens"] = count_tokens(f"{prompt['prompt_prefix']}\n```", model_name)
+            
+            self._by_key.setdefault((language, prompt["category"], prompt["subcategory"]), prompt)
+            categories_by_lang.setdefault(language, set()).add(prompt["category"])
+            subcategories_by_cat.setdefault((language, prompt["category"]), set()).add(prompt["subcategory"])
+        
+        self._categories_by_lang: Dict[str, FrozenSet[str]] = {
+            language: frozenset(categories) for language, categories in categories_by_lang.items()
+        }
+        self._subcategories_by_cat: Dict[Tuple[str, str], FrozenSet[str]] = {
+            key: frozenset(subcategories) for key, subcategories in subcategories_by_cat.items()
+        }
+        
+        # Filtered prompt lists by (language, frozenset of categories), filled on first use
+        self._filtered_cache: Dict[Tuple[str, FrozenSet[str]], List[Dict[str, Any]]] = {}
+        # Largest prompt_tokens of each filtered prompt list, keyed like _filtered_cache
+        self._max_tokens_cache: Dict[Tuple[str, Optional[FrozenSet[str]]], int] = {}
         
         logger.info(f"Loaded {len(self.prompts)} prompt templates from {prompts_file}")
     
@@ -44,8 +86,8 @@ class PromptManager:
             A list of prompt template dictionaries.
         """
         try:
-            with open(self.prompts_file, "r", encoding="utf-8") as f:
-                prompts = json.load(f)
+            data = Path(self.prompts_file).read_bytes()
+            prompts = orjson.loads(data) if orjson else json.loads(data)
             return prompts
         except Exception as e:
             logger.error(f"Error loading prompts from {self.prompts_file}: {str(e)}")
@@ -59,7 +101,7 @@ class PromptManager:
             categories: Optional list of specific vulnerability categories to include.
             
         Returns:
-            A list of prompt template dictionaries.
+            A list of prompt template dictionaries, shared between calls; do not modify it.
         """
         if language not in self.prompts_by_language:
             logger.warning(f"No prompts found for language: {language}")
@@ -67,12 +109,35 @@ class PromptManager:
         
         prompts = self.prompts_by_language[language]
         
-        # Filter by categories if specified
+        # Filter by categories if specified, once per distinct category set
         if categories:
-            prompts = [p for p in prompts if p["category"] in categories]
+            key = (language, frozenset(categories))
+            filtered = self._filtered_cache.get(key)
+            if filtered is None:
+                filtered = [p for p in prompts if p["category"] in key[1]]
+                self._filtered_cache[key] = filtered
+            prompts = filtered
         
         return prompts
     
+    def get_max_prompt_tokens(self, language: str, categories: Optional[List[str]] = None) -> int:
+        """Get the token count of the longest prompt used for a language and categories.
+        
+        Args:
+            language: The programming language of the code.
+            categories: Optional list of specific vulnerability categories to include.
+            
+        Returns:
+            The largest prompt_tokens of the matching prompts, or 0 if there are none.
+        """
+        key = (language, frozenset(categories) if categories else None)
+        tokens = self._max_tokens_cache.get(key)
+        if tokens is None:
+            prompts = self.get_prompts(language, categories)
+            tokens = max((prompt["prompt_tokens"] for prompt in prompts), default=0)
+            self._max_tokens_cache[key] = tokens
+        return tokens
+    
     def get_prompt_by_category(self, language: str, category: str, subcategory: str) -> Optional[Dict[str, Any]]:
         """Get a specific prompt template by category and subcategory.
         
@@ -84,11 +149,9 @@ class PromptManager:
         Returns:
             A prompt template dictionary, or None if not found.
         """
-        for prompt in self.prompts:
-            if (prompt["language"] == language and 
-                prompt["category"] == category and 
-                prompt["subcategory"] == subcategory):
-                return prompt
+        prompt = self._by_key.get((language, category, subcategory))
+        if prompt is not None:
+            return prompt
         
         logger.warning(f"No prompt found for {language}/{category}/{subcategory}")
         return None
@@ -102,14 +165,7 @@ class PromptManager:
         Returns:
             A list of category names.
         """
-        if language not in self.prompts_by_language:
-            return []
-        
-        categories = set()
-        for prompt in self.prompts_by_language[language]:
-            categories.add(prompt["category"])
-        
-        return list(categories)
+        return list(self._categories_by_lang.get(language, ()))
     
     def get_subcategories(self, language: str, category: str) -> List[str]:
         """Get all available subcategories for a language and category.
@@ -121,12 +177,4 @@ class PromptManager:
         Returns:
             A list of subcategory names.
         """
-        if language not in self.prompts_by_language:
-            return []
-        
-        subcategories = set()
-        for prompt in self.prompts_by_language[language]:
-            if prompt["category"] == category:
-                subcategories.add(prompt["subcategory"])
-        
-        return list(subcategories)
\ No newline at end of file
+        return list(self._subcategories_by_cat.get((language, category), ()))
\ No newline at end of file
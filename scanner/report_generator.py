@@ -1,4 +1,4 @@
-\"""Report Generator module for the Cerebras Code Scanner.
+"""Report Generator module for the Cerebras Code Scanner.
 
 This module contains the ReportGenerator class that is responsible for generating
 formatted reports of the scan results.
@@ -8,10 +8,19 @@ import json
 from pathlib import Path
 from typing import Dict, List, Any
 import logging
+from collections import defaultdict
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Write buffer used when streaming reports to disk
+REPORT_BUFFER_SIZE = 1 << 20
+
 class ReportGenerator:
     """Generates formatted reports of scan results.
     
@@ -55,87 +64,87 @@ class ReportGenerator:
         issues = results["issues"]
         stats = results["stats"]
         
-        # Create report content
-        report = []
-        
-        # Add header
-        report.append("# Cerebras Code Scanner Report")
-        report.append(f"*Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
-        report.append("")
-        
-        # Add summary
-        report.append("## Summary")
-        report.append(f"- **Files Scanned**: {stats['files_scanned']}")
-        report.append(f"- **Total Issues Found**: {stats['total_issues']}")
-        report.append("")
-        
-        # Add issues by category
-        report.append("### Issues by Category")
-        for category, count in stats.get("categories", {}).items():
-            report.append(f"- **{category}**: {count} issues")
-        report.append("")
-        
         # Group issues by file
-        issues_by_file = {}
+        issues_by_file = defaultdict(list)
         for issue in issues:
-            file_path = issue["file_path"]
-            if file_path not in issues_by_file:
-                issues_by_file[file_path] = []
-            issues_by_file[file_path].append(issue)
-        
-        # Add detailed findings
-        report.append("## Detailed Findings")
+            issues_by_file[issue["file_path"]].append(issue)
         
-        if not issues:
-            report.append("*No issues found.*")
-        else:
-            # Sort files by number of issues (descending)
-            sorted_files = sorted(issues_by_file.keys(), 
-                                 key=lambda x: len(issues_by_file[x]), 
-                                 reverse=True)
+        # Stream the report straight to the file instead of building it in memory
+        with open(output_path, "w", encoding="utf-8", buffering=REPORT_BUFFER_SIZE) as f:
+            # Add header
+            f.write("# Cerebras Code Scanner Report\n")
+            f.write(f"*Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
+            f.write("\n")
             
-            for file_path in sorted_files:
-                file_issues = issues_by_file[file_path]
-                report.append(f"### {file_path}")
-                report.append(f"*{len(file_issues)} issues found*")
-                report.append("")
-                
-                # Group by category and subcategory
-                by_category = {}
-                for issue in file_issues:
-                    category = issue["category"]
-                    subcategory = issue["subcategory"]
-                    key = f"{category} - {subcategory}"
-                    
-                    if key not in by_category:
-                        by_category[key] = []
-                    by_category[key].append(issue)
+            # Add summary
+            f.write("## Summary\n")
+            f.write(f"- **Files Scanned**: {stats['files_scanned']}\n")
+            f.write(f"- **Total Issues Found**: {stats['total_issues']}\n")
+            f.write("\n")
+            
+            # Add issues by category
+            f.write("### Issues by Category\n")
+            for category, count in stats.get("categories", {}).items():
+                f.write(f"- **{category}**: {count} issues\n")
+            f.write("\n")
+            
+            # Add detailed findings
+            f.write("## Detailed Findings\n")
+            
+            if not issues:
+                f.write("*No issues found.*\n")
+            else:
+                # Sort files by number of issues (descending); the sort is stable, so ties keep scan order
+                sorted_files = sorted(issues_by_file.items(), key=lambda item: len(item[1]), reverse=True)
                 
-                # Add issues grouped by category
-                for cat_key, cat_issues in by_category.items():
-                    report.append(f"#### {cat_key}")
+                for file_path, file_issues in sorted_files:
+                    f.write(f"### {file_path}\n")
+                    f.write(f"*{len(file_issues)} issues found*\n")
+                    f.write("\n")
                     
-                    for i, issue in enumerate(cat_issues, 1):
-                        report.append(f"**Issue {i}**:")
-                        report.append(issue["description"])
-                        report.append("")
+                    # Group by category and subcategory
+                    by_category = defaultdict(list)
+                    for issue in file_issues:
+                        by_category[f"{issue['category']} - {issue['subcategory']}"].append(issue)
                     
-                    report.append("")
-        
-        # Write report to file
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write("\n".join(report))
+                    # Add issues grouped by category
+                    for cat_key, cat_issues in by_category.items():
+                        f.write(f"#### {cat_key}\n")
+                        
+                        for i, issue in enumerate(cat_issues, 1):
+                            f.write(f"**Issue {i}**:\n")
+                            f.write(f"{issue['description']}\n")
+                            f.write("\n")
+                        
+                        f.write("\n")
     
     def _generate_json_report(self, results: Dict[str, Any], output_path: Path) -> None:
         """Generate a JSON report of the scan results.
         
+        The model responses that issues refer to by response_id are written compactly to
+        a sibling file (e.g. scan_report.responses.json) rather than into the report.
+        
         Args:
             results: The scan results dictionary.
             output_path: Path to save the report to.
         """
+        report = {key: value for key, value in results.items() if key != "responses"}
+        
         # Add timestamp to results
-        results["timestamp"] = datetime.now().isoformat()
+        report["timestamp"] = datetime.now().isoformat()
         
         # Write JSON report to file
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, indent=2)
\ No newline at end of file
+        if orjson:
+            output_path.write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        
+        responses = results.get("responses")
+        if responses:
+            responses_path = output_path.with_suffix(".responses.json")
+            if orjson:
+                responses_path.write_bytes(orjson.dumps(responses, option=orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(responses_path, "w", encoding="utf-8") as f:
+                    json.dump(responses, f, separators=(",", ":"))
\ No newline at end of file
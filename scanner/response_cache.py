@@ -0,0 +1,101 @@
+"""Response Cache module for the Cerebras Code Scanner.
+
+This module contains the ResponseCache class that stores model responses on disk so
+re-scans of unchanged code do not call the Cerebras API again.
+"""
+
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default time-to-live of a cached response, in seconds
+DEFAULT_CACHE_TTL = 7 * 86400
+
+class ResponseCache:
+    """Persistent exact-match cache of model responses.
+    
+    Responses are stored in a SQLite table keyed by a hash of the model, the sampling
+    parameters and the prompt. The cache can be shared by the worker threads of a scan.
+    """
+    
+    def __init__(self, cache_dir: Union[str, Path], ttl: Optional[int] = DEFAULT_CACHE_TTL):
+        """Initialize the ResponseCache.
+        
+        Args:
+            cache_dir: Directory to keep the cache database in.
+            ttl: Seconds a response stays valid, or None to keep responses forever.
+        """
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = cache_dir / "responses.sqlite"
+        self.ttl = ttl
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key BLOB PRIMARY KEY, response TEXT, ts INTEGER)"
+        )
+        self._conn.commit()
+        
+        logger.info(f"Using response cache at {self.path}")
+    
+    @staticmethod
+    def make_key(model_name: str, temperature: float, top_p: float, max_tokens: int, prompt: str) -> bytes:
+        """Build the cache key of a request.
+        
+        Args:
+            model_name: The model the prompt is sent to.
+            temperature: The sampling temperature.
+            top_p: The nucleus sampling parameter.
+            max_tokens: The maximum number of tokens in the response.
+            prompt: The prompt.
+        
+        Returns:
+            A 16-byte key.
+        """
+        data = f"{model_name}|{temperature}|{top_p}|{max_tokens}|{prompt}".encode("utf-8")
+        return hashlib.blake2b(data, digest_size=16).digest()
+    
+    def get(self, key: bytes) -> Optional[str]:
+        """Get a cached response.
+        
+        Args:
+            key: The cache key.
+        
+        Returns:
+            The cached response, or None if it is missing or expired.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT response, ts FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        
+        response, ts = row
+        if self.ttl is not None and ts + self.ttl < time.time():
+            return None
+        return response
+    
+    def set(self, key: bytes, response: str) -> None:
+        """Store a response.
+        
+        Args:
+            key: The cache key.
+            response: The model's response.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, ts) VALUES (?, ?, ?)",
+                (key, response, int(time.time()))
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
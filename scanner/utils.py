@@ -4,11 +4,28 @@ This module contains utility functions for logging, configuration, code chunking
 and other helper functions.
 """
 
+import io
 import os
+import ast
+import re
 import json
 import logging
+import tokenize
+import functools
 from pathlib import Path
-from typing import Dict, List, Any, Union
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Encoding used for models tiktoken has no encoding of its own for
+DEFAULT_ENCODING = "cl100k_base"
+# Characters per token assumed when tiktoken is not installed
+CHARS_PER_TOKEN = 5
+# Directory names never descended into when looking for source files
+SKIPPED_DIRS = frozenset({".git", "node_modules", "venv", ".venv", "__pycache__"})
 
 def setup_logging(log_level: str = "INFO") -> logging.Logger:
     """Set up logging configuration.
@@ -57,17 +74,53 @@ def load_config(config_path: Union[str, Path] = "config.json") -> Dict[str, Any]
             "max_response_tokens": 2048,
             "temperature": 0.2,
             "top_p": 0.95,
+            "concurrency": 16,
+            "prefetch": 32,
+            "max_retries": 4,
+            "cache_dir": ".scanner_cache",
+            "cache_ttl": 604800,
+            "normalized_cache": True,
+            "use_manifest": True,
+            "parse_workers": 0,
+            "schedule": "by_category",
             "prompts_file": "docs/proprompts.json"
         }
     
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
+        data = config_path.read_bytes()
+        config = orjson.loads(data) if orjson else json.loads(data)
         return config
     except Exception as e:
         logging.error(f"Error loading config from {config_path}: {str(e)}")
         raise
 
+def iter_source_files(root: Union[str, Path], exts: Tuple[str, ...] = (".py", ".sql")) -> Iterator[str]:
+    """Recursively find source files with a single os.scandir-based walk.
+    
+    File types come from the directory listing, so no file is stat'ed, and directories
+    named in SKIPPED_DIRS are not descended into. Symlinks are not followed.
+    
+    Args:
+        root: Directory to search.
+        exts: Lower-case file extensions to yield.
+        
+    Yields:
+        The path of each matching file.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.lower().endswith(exts) and entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError as e:
+            logging.warning(f"Error listing directory {directory}: {str(e)}")
+
 def get_file_language(file_path: Path) -> str:
     """Determine the programming language of a file based on its extension.
     
@@ -86,25 +139,144 @@ def get_file_language(file_path: Path) -> str:
     else:
         return "Unknown"
 
-def chunk_code(code: str, max_tokens: int = 4000) -> List[str]:
+# One SQL token for normalization: a quoted literal or identifier (kept verbatim, running to
+# the end if unterminated), a comment, a whitespace run, or any other text
+_SQL_TOKEN_RE = re.compile(
+    r"(?P<literal>'(?:[^']|'')*'?|\"(?:[^\"]|\"\")*\"?)"
+    r"|(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<space>\s+)"
+    r"|[^'\"\s/-]+|.",
+    re.DOTALL
+)
+
+# A function or class definition, up to the next one
+_FUNC_RE = re.compile(
+    r"(\s*def\s+\w+\s*\(.*?\)\s*:.*?(?=\s*def\s+|\s*class\s+|$)"
+    r"|\s*class\s+\w+.*?(?=\s*def\s+|\s*class\s+|$))",
+    re.DOTALL
+)
+
+# Top-level nodes that become their own chunk
+_DEFINITION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+# Python tokens that carry no meaning for the analysis
+_IGNORED_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.ENDMARKER}
+# Structural Python tokens, kept by type since their text is only whitespace
+_STRUCTURAL_TOKENS = {tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT}
+
+def normalize_code(code: str, language: str) -> str:
+    """Normalize code so chunks that differ only in comments and whitespace compare equal.
+    
+    Python code is reduced to its token stream (keeping indentation structure), and SQL
+    has comments stripped and whitespace collapsed outside quoted literals. Other code, or
+    Python that does not tokenize, is returned unchanged since its literals are not known.
+    
+    Args:
+        code: The code to normalize.
+        language: The programming language name.
+        
+    Returns:
+        The normalized code.
+    """
+    if language == "Python":
+        try:
+            tokens = []
+            for token in tokenize.generate_tokens(io.StringIO(code).readline):
+                if token.type in _IGNORED_TOKENS:
+                    continue
+                if token.type in _STRUCTURAL_TOKENS:
+                    tokens.append(tokenize.tok_name[token.type])
+                else:
+                    tokens.append(token.string)
+            return " ".join(tokens)
+        except (tokenize.TokenError, SyntaxError):
+            pass
+    elif language == "SQL":
+        parts = []
+        for match in _SQL_TOKEN_RE.finditer(code):
+            # Comments separate tokens like whitespace does
+            if match.lastgroup in ("comment", "space"):
+                if parts and parts[-1] != " ":
+                    parts.append(" ")
+            else:
+                parts.append(match.group())
+        return "".join(parts).strip()
+    
+    return code
+
+@functools.lru_cache(maxsize=8)
+def get_token_encoding(model_name: Optional[str] = None):
+    """Get the tiktoken encoding for a model, loading it once per process.
+    
+    Args:
+        model_name: The model name; models tiktoken does not know use DEFAULT_ENCODING.
+        
+    Returns:
+        The encoding, or None if tiktoken is not installed.
+    """
+    # Imported on first use: tiktoken is slow to import and only needed when chunking
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    if model_name:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Count the tokens of a text the way chunk_code measures them.
+    
+    Args:
+        text: The text to measure.
+        model_name: The model the text is sent to, used to pick the encoding.
+        
+    Returns:
+        The number of tokens, approximated as CHARS_PER_TOKEN characters each
+        when tiktoken is not installed.
+    """
+    encoding = get_token_encoding(model_name)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode_ordinary(text))
+
+def chunk_code(code: str, max_tokens: int = 4000, model_name: Optional[str] = None,
+               reserve: int = 0) -> List[str]:
     """Split code into manageable chunks for processing.
     
-    This is a simple implementation that splits code by lines to avoid
-    exceeding token limits. A more sophisticated implementation would
-    use a tokenizer to count actual tokens.
+    Lines are packed greedily into chunks of at most max_tokens - reserve tokens,
+    counted with tiktoken. Without tiktoken, tokens are approximated as
+    CHARS_PER_TOKEN characters each.
     
     Args:
         code: The code to split into chunks.
-        max_tokens: Maximum number of tokens per chunk (approximate).
+        max_tokens: Maximum number of tokens per chunk.
+        model_name: The model the chunks are sent to, used to pick the encoding.
+        reserve: Tokens of max_tokens kept free for the rest of the prompt.
         
     Returns:
         A list of code chunks.
+        
+    Raises:
+        ValueError: If reserve leaves no room for code in max_tokens.
     """
-    # Simple approximation: assume average of 5 characters per token
-    max_chars = max_tokens * 5
+    if reserve >= max_tokens:
+        raise ValueError(f"The prompt needs {reserve} tokens, leaving no room for code in "
+                         f"chunks of {max_tokens} tokens; raise max_chunk_tokens")
+    encoding = get_token_encoding(model_name)
+    budget = max_tokens - reserve
+    
+    if encoding is None:
+        # Simple approximation: assume average of CHARS_PER_TOKEN characters per token
+        budget *= CHARS_PER_TOKEN
+        measure = len
+    else:
+        measure = lambda text: len(encoding.encode_ordinary(text))
     
     # If code is small enough, return it as a single chunk
-    if len(code) <= max_chars:
+    if len(code) <= budget or measure(code) <= budget:
         return [code]
     
     lines = code.split("\n")
@@ -113,10 +285,10 @@ def chunk_code(code: str, max_tokens: int = 4000) -> List[str]:
     current_size = 0
     
     for line in lines:
-        line_size = len(line) + 1  # +1 for newline
+        line_size = measure(line) + 1  # +1 for newline
         
         # If adding this line would exceed the limit, start a new chunk
-        if current_size + line_size > max_chars and current_chunk:
+        if current_size + line_size > budget and current_chunk:
             chunks.append("\n".join(current_chunk))
             current_chunk = []
             current_size = 0
@@ -135,7 +307,11 @@ def extract_function_chunks(code: str) -> List[str]:
     """Extract individual functions from Python code.
     
     This is a more sophisticated chunking method that tries to keep
-    functions together as logical units.
+    functions together as logical units. The code is parsed with ast and
+    sliced along the line ranges of its top-level functions and classes
+    (including their decorators and leading comments); runs of other
+    statements in between are kept together as their own chunks. Code that does not parse falls back
+    to a regex-based split.
     
     Args:
         code: The Python code to split into function chunks.
@@ -143,14 +319,55 @@ def extract_function_chunks(code: str) -> List[str]:
     Returns:
         A list of code chunks, each containing a function or class.
     """
-    import re
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return _extract_function_chunks_regex(code)
+    
+    # If no functions or classes, return the whole code as one chunk
+    if not any(isinstance(node, _DEFINITION_NODES) for node in tree.body):
+        return [code]
     
-    # Pattern to match function or class definitions
-    pattern = r"(\s*def\s+\w+\s*\(.*?\)\s*:.*?(?=\s*def\s+|\s*class\s+|$)" + \
-              r"|\s*class\s+\w+.*?(?=\s*def\s+|\s*class\s+|$))"
+    lines = code.splitlines(keepends=True)
+    segments = []
+    start = 0
+    # End line of the run of other statements since the last definition, if any
+    statements_end = None
     
-    # Find all matches
-    matches = re.findall(pattern, code, re.DOTALL)
+    for node in tree.body:
+        if not isinstance(node, _DEFINITION_NODES):
+            statements_end = node.end_lineno
+            continue
+        
+        # Close the run of statements; comments after it go with the definition
+        if statements_end is not None:
+            segments.append(lines[start:statements_end])
+            start = statements_end
+            statements_end = None
+        
+        segments.append(lines[start:node.end_lineno])
+        start = node.end_lineno
+    
+    segments.append(lines[start:])
+    
+    chunks = []
+    for segment in segments:
+        chunk = "".join(segment).strip()
+        if chunk:
+            chunks.append(chunk)
+    return chunks
+
+def _extract_function_chunks_regex(code: str) -> List[str]:
+    """Extract functions and classes with a regex, for code that does not parse.
+    
+    Args:
+        code: The code to split into function chunks.
+        
+    Returns:
+        A list of code chunks, each containing a function or class.
+    """
+    # Find all function or class definitions
+    matches = _FUNC_RE.findall(code)
     
     # If no matches (no functions or classes), return the whole code as one chunk
     if not matches:
@@ -1,21 +1,308 @@
 import os
-from typing import List, Dict, Any
+import re
+import json
+import time
+import bisect
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import logging
+import importlib.util
+from pathlib import Path
+from types import MappingProxyType
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+import httpx
 from cerebras_cloud_sdk import CerebrasAPI
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Whether .env has been loaded into the environment; it is read on first use, not at import
+_DOTENV_LOADED = False
+
+logger = logging.getLogger(__name__)
+
+# Sampling parameters sent with every request; they are part of the cache key
+GENERATION_PARAMS = {
+    "max_tokens": 400,  # A compact JSON object; most responses are an empty issue list
+    "temperature": 0.0,  # Greedy decoding: identical prompts get identical analyses
+    "seed": 0,
+    "response_format": {"type": "json_object"},
+    "stop": ["\n\n", "```"]  # Stop once the single-line JSON object ends
+}
+
+# Output format appended to every system prompt
+_JSON_INSTRUCTION = (
+    'Respond ONLY as JSON on a single line: '
+    '{"issues":[{"where":"...","why":"...","fix":"..."}]}. '
+    'Respond {"issues":[]} if there are none.'
+)
+
+# Static instructions sent as the system message, per category. The code goes in a
+# separate user message after them, so every request of a category starts with the same
+# tokens and the server can reuse its cached prefix; keep these free of any interpolation.
+# TODO: Load these from a configuration file
+_SYSTEM_PROMPTS = MappingProxyType({
+    "sql_injection": (
+        "You are a security expert analyzing Python code for SQL injection vulnerabilities.\n"
+        "\n"
+        "Analyze the code in the user's message and identify any potential SQL injection risks.\n"
+        "\n"
+        "List any SQL injection vulnerabilities found, explaining:\n"
+        "1. Where the vulnerability is\n"
+        "2. Why it's dangerous\n"
+        "3. How to fix it\n"
+        "\n" + _JSON_INSTRUCTION
+    ),
+    
+    "auth": (
+        "You are a security expert analyzing Python code for authentication and credential security issues.\n"
+        "\n"
+        "Analyze the code in the user's message and identify any authentication-related security issues.\n"
+        "\n"
+        "List any authentication vulnerabilities found, explaining:\n"
+        "1. Where the vulnerability is\n"
+        "2. Why it's dangerous\n"
+        "3. How to fix it\n"
+        "\n" + _JSON_INSTRUCTION
+    ),
+    
+    # Add more templates for other categories...
+})
+
+# Category keys analyze_code accepts
+SUPPORTED_CATEGORIES = frozenset(_SYSTEM_PROMPTS)
+
+# What each category looks for, as listed in the batch system prompt
+_CATEGORY_DESCRIPTIONS = MappingProxyType({
+    "sql_injection": "SQL injection vulnerabilities",
+    "auth": "authentication and credential security issues"
+})
+
+# System prompt of batched requests; like the per-category prompts it is fully static
+_BATCH_SYSTEM_PROMPT = (
+    "You are a security expert analyzing Python code snippets.\n"
+    "\n"
+    "The user's message is a JSON array of snippets, each with an \"id\", a \"category\" and "
+    "the \"code\". Analyze each snippet only for its category:\n"
+    + "".join(f"- {key}: {description}\n" for key, description in sorted(_CATEGORY_DESCRIPTIONS.items()))
+    + "\n"
+    "For each issue, explain where it is, why it's dangerous and how to fix it.\n"
+    "\n"
+    'Respond ONLY as JSON on a single line: '
+    '{"results":[{"id":"...","issues":[{"where":"...","why":"...","fix":"..."}]}]}, '
+    'with one result per snippet and "issues":[] for snippets without issues.'
+)
+# Size cap of the code packed into one batched request, in characters, and the most
+# snippets in one request (max_tokens grows with the number of snippets)
+BATCH_MAX_CHARS = 8192
+BATCH_MAX_SNIPPETS = 8
+
+# A numbered issue in a free-text response: location, explanation and fix on their own lines
+_ISSUE_RE = re.compile(
+    r"^\s*\d+\.\s*(?P<where>.+?)\n\s*(?P<why>.+?)\n\s*(?P<fix>.+?)(?=\n\s*\d+\.|\Z)",
+    re.S | re.M
+)
+
+# Code worth sending for SQL injection analysis: SELECT *, f-strings with placeholders in
+# either quote style, any string literal containing SQL (however it is later concatenated or
+# formatted) and any execute call
+_HOTSPOT_RE = re.compile(
+    r"(?i)(SELECT\s+\*"
+    r"|\bf\"[^\"\n]*\{|\bf'[^'\n]*\{"
+    r"|[\"'][^\"'\n]*\b(SELECT|INSERT|UPDATE|DELETE|WHERE|FROM|VALUES|ORDER\s+BY)\b"
+    r"|\.execute(many)?\s*\()"
+)
+# Code worth sending for authentication analysis: anything handling credentials or sessions
+_AUTH_HOTSPOT_RE = re.compile(r"(?i)(passw(or)?d|secret|token|api_?key|credential|login|authenticat|session|jwt)")
+# Hot spot pattern per category; code without a match in its category is not sent at all
+_HOTSPOT_PATTERNS = MappingProxyType({
+    "sql_injection": _HOTSPOT_RE,
+    "auth": _AUTH_HOTSPOT_RE
+})
+# Code shorter than this is sent whole; longer code is cut down to its hot spots
+HOTSPOT_MIN_CHARS = 2048
+# Lines kept around each hot spot, and the size cap of the hot spot slices
+HOTSPOT_CONTEXT_LINES = 20
+HOTSPOT_MAX_CHARS = 4096
+# Placed between non-adjacent hot spot slices
+_HOTSPOT_SEPARATOR = "\n# ---\n"
+
+def slice_hotspots(code: str, category: str) -> Optional[str]:
+    """
+    Cut code down to the regions around the hot spots of a category.
+    
+    Args:
+        code (str): The Python code to analyze
+        category (str): The category of issues to look for
+        
+    Returns:
+        The code to send to the model, at most HOTSPOT_MAX_CHARS long once cut down, or None
+        if it has no hot spots and need not be analyzed
+    """
+    pattern = _HOTSPOT_PATTERNS.get(category)
+    if pattern is None or len(code) < HOTSPOT_MIN_CHARS:
+        return code
+    
+    lines = code.splitlines(keepends=True)
+    line_starts = [0]
+    for line in lines[:-1]:
+        line_starts.append(line_starts[-1] + len(line))
+    
+    # Merge the windows of lines around each match
+    windows = []
+    for match in pattern.finditer(code):
+        first = max(bisect.bisect_right(line_starts, match.start()) - 1 - HOTSPOT_CONTEXT_LINES, 0)
+        last = bisect.bisect_right(line_starts, match.end()) + HOTSPOT_CONTEXT_LINES
+        if windows and first <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], last)
+        else:
+            windows.append([first, last])
+    if not windows:
+        return None
+    
+    slices = []
+    size = 0
+    for first, last in windows:
+        piece = "".join(lines[first:last])
+        # The separator joining this slice to the previous one counts toward the cap too
+        separator = len(_HOTSPOT_SEPARATOR) if slices else 0
+        budget = HOTSPOT_MAX_CHARS - size - separator
+        if budget <= 0:
+            break
+        if len(piece) > budget:
+            # Keep the whole lines that fit, or a cut line if not even one does
+            cut = piece.rfind("\n", 0, budget)
+            piece = piece[:cut + 1] if cut != -1 else piece[:budget]
+            if piece.strip():
+                slices.append(piece)
+            break
+        slices.append(piece)
+        size += separator + len(piece)
+    return _HOTSPOT_SEPARATOR.join(piece.rstrip("\n") for piece in slices)
+
+def _skipped_result() -> Dict[str, Any]:
+    """Result of code that was not sent because it has no hot spots; it was not analyzed."""
+    return {"raw_response": "", "issues": [], "skipped": True}
+
+# Text around the code in the user message
+_CODE_PREFIX = "```python\n"
+_CODE_SUFFIX = "\n```"
+
+# Connections kept open to the API, and the request timeout in seconds
+HTTP_POOL_SIZE = 32
+HTTP_TIMEOUT = 60.0
+# HTTP/2 multiplexes concurrent requests over one connection; it needs the h2 package
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Where analysis results are cached between runs
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "cerebras-scanner"
+# Seconds a cached analysis stays valid
+CACHE_TTL = 7 * 86400
+
+class PromptCache:
+    """On-disk cache of analysis results keyed by a hash of the request."""
+    
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, ttl: int = CACHE_TTL):
+        """
+        Open (or create) the cache database.
+        
+        Args:
+            cache_dir (Path): Directory to keep the cache database in
+            ttl (int): Seconds an entry stays valid
+        """
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(cache_dir / "prompts.sqlite"), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT, expires REAL)")
+        self._conn.commit()
+    
+    @staticmethod
+    def generate_cache_key(model: str, formatted_prompt: str) -> str:
+        """Hash the model, the sampling parameters and the prompt into a cache key."""
+        params = json.dumps(GENERATION_PARAMS, sort_keys=True)
+        data = f"{model}|{params}|{formatted_prompt}"
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a key, or None if it is missing or expired."""
+        with self._lock:
+            row = self._conn.execute("SELECT result, expires FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+    
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result under a key."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, result, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(result), time.time() + self.ttl)
+            )
+            self._conn.commit()
+
+# Marks that CodeScanner should open the default cache
+_DEFAULT_CACHE = object()
 
 class CodeScanner:
-    def __init__(self):
-        """Initialize the scanner with Cerebras API client."""
+    """
+    Scans code for security issues with a Cerebras-hosted model.
+    
+    Requests are sent with temperature 0 and a fixed seed, so an analysis depends only on
+    the model, GENERATION_PARAMS and the prompt; those make up the prompt cache key. Results
+    of analyze_batch are keyed on the batch system prompt instead of the category's.
+    """
+    
+    def __init__(self, cache: Optional[PromptCache] = _DEFAULT_CACHE):
+        """
+        Initialize the scanner with Cerebras API client.
+        
+        Args:
+            cache (PromptCache): Cache of analysis results; defaults to one under
+                DEFAULT_CACHE_DIR, or pass None to disable caching
+        """
+        # Load environment variables
+        global _DOTENV_LOADED
+        if not _DOTENV_LOADED:
+            load_dotenv()
+            _DOTENV_LOADED = True
+        
         api_key = os.getenv("CEREBRAS_API_KEY")
         if not api_key:
             raise ValueError("CEREBRAS_API_KEY environment variable not found")
         
-        self.client = CerebrasAPI(api_key=api_key)
+        # One pooled HTTP client, so successive requests reuse open connections
+        # instead of paying a TLS handshake each
+        self._http = httpx.AsyncClient(
+            http2=_HTTP2,
+            limits=httpx.Limits(max_keepalive_connections=HTTP_POOL_SIZE, max_connections=HTTP_POOL_SIZE),
+            timeout=HTTP_TIMEOUT
+        )
+        self.client = CerebrasAPI(api_key=api_key, http_client=self._http)
         # Using Llama 2 70B model as it's available on Cerebras
         self.model = "meta-llama/Llama-2-70b-chat-hf"
+        if cache is _DEFAULT_CACHE:
+            try:
+                cache = PromptCache()
+            except (OSError, sqlite3.Error) as e:
+                # e.g. a read-only home directory; scanning works without the cache
+                logger.warning(f"Prompt cache unavailable, continuing without it: {e}")
+                cache = None
+        self.cache = cache
+        # In-flight analysis task per (category, code digest), so identical inputs that arrive
+        # before the first result is cached share one request; finished tasks are dropped
+        self._run_cache: Dict[Tuple[str, bytes], asyncio.Future] = {}
+    
+    async def __aenter__(self) -> "CodeScanner":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the scanner's HTTP connections."""
+        await self._http.aclose()
         
     async def analyze_code(self, code: str, category: str) -> Dict[str, Any]:
         """
@@ -28,26 +315,56 @@ class CodeScanner:
         Returns:
             Dict containing the analysis results
         """
-        # Get the appropriate prompt template for this category
-        prompt = self._get_prompt_template(category)
+        key = (category, hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest())
+        task = self._run_cache.get(key)
+        if task is None:
+            # Checked and set without an await in between, so no lock is needed
+            task = asyncio.ensure_future(self._analyze_code(code, category))
+            self._run_cache[key] = task
+            task.add_done_callback(lambda done: self._run_cache.pop(key, None))
         
-        # Format the prompt with the code
-        formatted_prompt = prompt.format(code=code)
+        # Shield the shared task so one caller being cancelled does not cancel it for the others
+        return await asyncio.shield(task)
+    
+    async def _analyze_code(self, code: str, category: str) -> Dict[str, Any]:
+        """Analyze a piece of code, consulting the prompt cache first."""
+        # Without a template the model would get an empty system prompt
+        if category not in SUPPORTED_CATEGORIES:
+            return {
+                "error": f"Unknown category: {category}",
+                "category": category,
+                "issues": []
+            }
+        
+        # Send only the regions that can contain issues of this category
+        code = slice_hotspots(code, category)
+        if code is None:
+            return _skipped_result()
+        
+        messages, cache_key = self._build_request(code, category)
+        
+        # Identical prompts get identical analyses, so serve repeats from the cache
+        if cache_key is not None:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                return cached
         
         try:
             # Call Cerebras API for inference
-            response = await self.client.generate(
+            response = await self.client.chat.completions.create(
                 model=self.model,
-                prompt=formatted_prompt,
-                max_tokens=1000,
-                temperature=0.1,  # Low temperature for more focused analysis
-                top_p=0.9,
-                top_k=50,
-                stop=["```"]  # Stop when code block ends
+                messages=messages,
+                **GENERATION_PARAMS
             )
             
-            # Parse and return the response
-            return self._parse_response(response.text if hasattr(response, 'text') else response)
+            # Parse and return the response; unusable responses are errors and are not cached
+            choice = response.choices[0]
+            result = self._parse_response(choice.message.content, getattr(choice, "finish_reason", None))
+            if "error" in result:
+                return dict(result, category=category)
+            if cache_key is not None:
+                await self._cache_put(cache_key, result)
+            return result
             
         except Exception as e:
             return {
@@ -56,50 +373,243 @@ class CodeScanner:
                 "issues": []
             }
     
-    def _get_prompt_template(self, category: str) -> str:
-        """Get the appropriate prompt template for a category."""
-        # TODO: Load these from a configuration file
-        templates = {
-            "sql_injection": """You are a security expert analyzing Python code for SQL injection vulnerabilities.
-            
-            Analyze this code and identify any potential SQL injection risks:
-            
-            ```python
-            {code}
-            ```
-            
-            List any SQL injection vulnerabilities found, explaining:
-            1. Where the vulnerability is
-            2. Why it's dangerous
-            3. How to fix it
+    async def analyze_code_stream(self, code: str, category: str) -> AsyncIterator[str]:
+        """
+        Analyze a piece of code, yielding the response text as it is generated.
+        
+        Pass the concatenated text to finalize_stream once the stream ends to get the
+        analysis results. API errors, and responses cut off at max_tokens, are raised to the
+        caller.
+        
+        Args:
+            code (str): The Python code to analyze
+            category (str): The category of issues to look for (e.g., "sql_injection", "auth")
             
-            Format your response in a clear, structured way.""",
+        Yields:
+            Pieces of the response text
+        """
+        if category not in SUPPORTED_CATEGORIES:
+            raise ValueError(f"Unknown category: {category}")
+        
+        # Code without hot spots is not analyzed, so the stream is empty
+        code = slice_hotspots(code, category)
+        if code is None:
+            return
+        
+        messages, cache_key = self._build_request(code, category)
+        
+        if cache_key is not None:
+            cached = await self._cache_get(cache_key)
+            if cached is not None:
+                yield cached["raw_response"]
+                return
+        
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            **GENERATION_PARAMS
+        )
+        finish_reason = None
+        async for chunk in stream:
+            choice = chunk.choices[0]
+            finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+            text = choice.delta.content
+            if text:
+                yield text
+        if finish_reason == "length":
+            raise ValueError("The response was cut off at max_tokens")
+    
+    def finalize_stream(self, code: str, category: str, response: str) -> Dict[str, Any]:
+        """
+        Parse the full text of a streamed analysis and cache the result.
+        
+        Args:
+            code (str): The Python code that was analyzed
+            category (str): The category that was analyzed
+            response (str): The concatenated text yielded by analyze_code_stream
             
-            "auth": """You are a security expert analyzing Python code for authentication and credential security issues.
+        Returns:
+            Dict containing the analysis results, with an "error" if the response is unusable
+        """
+        code = slice_hotspots(code, category)
+        if code is None:
+            return _skipped_result()
+        
+        result = self._parse_response(response)
+        if "error" in result:
+            return dict(result, category=category)
+        
+        _, cache_key = self._build_request(code, category)
+        if cache_key is not None:
+            try:
+                self.cache.put(cache_key, result)
+            except Exception as e:
+                logger.warning(f"Error writing prompt cache: {e}")
+        return result
+    
+    async def analyze_batch(self, items: List[Tuple[str, str, str]]) -> List[Dict[str, Any]]:
+        """
+        Analyze many snippets with as few requests as possible.
+        
+        Snippets are packed into chat requests of up to BATCH_MAX_CHARS of code and
+        BATCH_MAX_SNIPPETS snippets each, which run concurrently. Results are read from and
+        stored in the prompt cache per snippet, under keys that include the batch prompt, so
+        they are never mistaken for analyze_code results.
+        
+        Args:
+            items (list): (file_id, category, code) tuples
             
-            Analyze this code and identify any authentication-related security issues:
+        Returns:
+            One dict of analysis results per item, in order, with the item's "id" and "category"
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pending = []
+        for index, (file_id, category, code) in enumerate(items):
+            if category not in SUPPORTED_CATEGORIES:
+                results[index] = {"id": file_id, "error": f"Unknown category: {category}",
+                                  "category": category, "issues": []}
+                continue
             
-            ```python
-            {code}
-            ```
+            code = slice_hotspots(code, category)
+            if code is None:
+                results[index] = dict(_skipped_result(), id=file_id, category=category)
+                continue
             
-            List any authentication vulnerabilities found, explaining:
-            1. Where the vulnerability is
-            2. Why it's dangerous
-            3. How to fix it
+            cache_key = None
+            if self.cache is not None:
+                cache_key = PromptCache.generate_cache_key(
+                    self.model, f"{_BATCH_SYSTEM_PROMPT}\0{category}\0{code}"
+                )
+                cached = await self._cache_get(cache_key)
+                if cached is not None:
+                    results[index] = dict(cached, id=file_id, category=category)
+                    continue
+            pending.append((index, code, cache_key))
+        
+        # Pack the remaining snippets into batches up to the size and count caps
+        batches = []
+        batch = []
+        size = 0
+        for entry in pending:
+            if batch and (size + len(entry[1]) > BATCH_MAX_CHARS or len(batch) == BATCH_MAX_SNIPPETS):
+                batches.append(batch)
+                batch = []
+                size = 0
+            batch.append(entry)
+            size += len(entry[1])
+        if batch:
+            batches.append(batch)
+        
+        await asyncio.gather(*(self._analyze_batch(items, batch, results) for batch in batches))
+        return results
+    
+    async def _analyze_batch(self, items: List[Tuple[str, str, str]], batch: List[Tuple[int, str, Optional[str]]],
+                             results: List[Optional[Dict[str, Any]]]) -> None:
+        """Send one batched request and store each snippet's result at its index in results."""
+        snippets = [{"id": str(index), "category": items[index][1], "code": code} for index, code, _ in batch]
+        params = dict(GENERATION_PARAMS, max_tokens=GENERATION_PARAMS["max_tokens"] * len(batch))
+        
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": _BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps(snippets)}
+                ],
+                **params
+            )
+            choice = response.choices[0]
+            if getattr(choice, "finish_reason", None) == "length":
+                raise ValueError("The response was cut off at max_tokens")
+            entries = json.loads(choice.message.content)["results"]
+            by_id = {str(entry.get("id")): entry for entry in entries if isinstance(entry, dict)}
+        except Exception as e:
+            for index, _, _ in batch:
+                file_id, category, _ = items[index]
+                results[index] = {"id": file_id, "error": str(e), "category": category, "issues": []}
+            return
+        
+        for index, _, cache_key in batch:
+            file_id, category, _ = items[index]
+            entry = by_id.get(str(index))
+            if entry is None:
+                results[index] = {"id": file_id, "error": "Missing from the batch response",
+                                  "category": category, "issues": []}
+                continue
             
-            Format your response in a clear, structured way.""",
+            issues = entry.get("issues")
+            if not isinstance(issues, list):
+                results[index] = {"id": file_id, "error": "The response is not in the requested format",
+                                  "category": category, "issues": []}
+                continue
             
-            # Add more templates for other categories...
-        }
+            result = {
+                "raw_response": json.dumps(entry),
+                "issues": [issue for issue in issues if isinstance(issue, dict)]
+            }
+            if cache_key is not None:
+                await self._cache_put(cache_key, result)
+            results[index] = dict(result, id=file_id, category=category)
+    
+    async def _cache_get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached result; cache errors are logged and count as a miss."""
+        try:
+            return await asyncio.to_thread(self.cache.get, cache_key)
+        except Exception as e:
+            logger.warning(f"Error reading prompt cache: {e}")
+            return None
+    
+    async def _cache_put(self, cache_key: str, result: Dict[str, Any]) -> None:
+        """Store a result; cache errors are logged so they never fail an analysis."""
+        try:
+            await asyncio.to_thread(self.cache.put, cache_key, result)
+        except Exception as e:
+            logger.warning(f"Error writing prompt cache: {e}")
+    
+    def _build_request(self, code: str, category: str) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """Build the chat messages for an analysis and their cache key (None without a cache)."""
+        # Get the static system prompt for this category; the code follows it
+        system_prompt = self._get_prompt_template(category)
+        user_prompt = _CODE_PREFIX + code + _CODE_SUFFIX
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
         
-        return templates.get(category, "")
+        cache_key = None
+        if self.cache is not None:
+            cache_key = PromptCache.generate_cache_key(self.model, f"{system_prompt}\0{user_prompt}")
+        return messages, cache_key
     
-    def _parse_response(self, response: str) -> Dict[str, Any]:
-        """Parse the LLM response into a structured format."""
-        # TODO: Implement proper parsing based on the response format
-        # For now, return a simple dict
+    def _get_prompt_template(self, category: str) -> str:
+        """Get the system prompt for a category."""
+        return _SYSTEM_PROMPTS.get(category, "")
+    
+    def _parse_response(self, response: str, finish_reason: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse the LLM's JSON response into a structured format.
+        
+        Responses cut off at max_tokens, and responses that are neither the requested JSON
+        nor numbered free-text issues, give a result with an "error" rather than no issues.
+        """
+        if finish_reason == "length":
+            return {"error": "The response was cut off at max_tokens", "raw_response": response, "issues": []}
+        
+        try:
+            issues = json.loads(response)["issues"]
+        except (ValueError, KeyError, TypeError):
+            # Not the requested JSON object (or cut off by a stop sequence); fall back to
+            # numbered free-text issues
+            issues = [
+                {field: value.strip() for field, value in match.groupdict().items()}
+                for match in _ISSUE_RE.finditer(response or "")
+            ]
+            if not issues:
+                return {"error": "The response is not in the requested format", "raw_response": response, "issues": []}
+        if not isinstance(issues, list):
+            return {"error": "The response is not in the requested format", "raw_response": response, "issues": []}
         return {
             "raw_response": response,
-            "issues": []  # We'll parse this properly later
+            "issues": [issue for issue in issues if isinstance(issue, dict)]
         } 
\ No newline at end of file
@@ -0,0 +1,16 @@
+from scanner.cerebras_scanner import slice_hotspots, HOTSPOT_MAX_CHARS
+
+HOTSPOT = 'cursor.execute(f"SELECT * FROM users WHERE id = {user_id}")\n'
+FILLER = "".join(f"value_{i} = compute({i})\n" for i in range(60))
+
+def test_slice_hotspots_respects_cap():
+    # A first window of every size around the cap, followed by more hot spots
+    for pad in range(HOTSPOT_MAX_CHARS - 1600, HOTSPOT_MAX_CHARS + 100):
+        code = "# " + "x" * pad + "\n" + (HOTSPOT + FILLER) * 3
+        result = slice_hotspots(code, "sql_injection")
+        assert result, pad
+        assert len(result) <= HOTSPOT_MAX_CHARS, (pad, len(result))
+
+if __name__ == "__main__":
+    test_slice_hotspots_respects_cap()
+    print("slice_hotspots stays within HOTSPOT_MAX_CHARS")
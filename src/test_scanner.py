@@ -3,9 +3,11 @@ from scanner.cerebras_scanner import CodeScanner
 import psycopg2
 
 async def test_scanner():
-    # Initialize the scanner
-    scanner = CodeScanner()
-    
+    # Initialize the scanner; its connections are reused by all the analyses and closed at the end
+    async with CodeScanner() as scanner:
+        await run_analyses(scanner)
+
+async def run_analyses(scanner):
     # Test SQL injection vulnerability
     sql_code = """
 def get_user_data(user_id):
@@ -15,10 +17,6 @@ def get_user_data(user_id):
     return cursor.fetchall()
     """
     
-    print("Testing SQL injection detection...")
-    result = await scanner.analyze_code(sql_code, "sql_injection")
-    print("SQL Injection Analysis:", result)
-    
     # Test hardcoded credentials
     auth_code = """
 def connect_to_db():
@@ -31,20 +29,15 @@ def connect_to_db():
     )
     """
     
-    print("\nTesting hardcoded credentials detection...")
-    result = await scanner.analyze_code(auth_code, "auth")
-    print("Auth Analysis:", result)
-    
-    # Test command injection
-    cmd_code = """
-def ping_host(host):
-    import os
-    os.system(f"ping -c 4 {host}")
-    """
+    # The analyses are independent, so run them concurrently
+    print("Testing SQL injection and hardcoded credentials detection...")
+    results = await asyncio.gather(
+        scanner.analyze_code(sql_code, "sql_injection"),
+        scanner.analyze_code(auth_code, "auth")
+    )
     
-    print("\nTesting command injection detection...")
-    result = await scanner.analyze_code(cmd_code, "input_validation")
-    print("Command Injection Analysis:", result)
+    print("SQL Injection Analysis:", results[0])
+    print("\nAuth Analysis:", results[1])
 
 if __name__ == "__main__":
     asyncio.run(test_scanner()) 
\ No newline at end of file
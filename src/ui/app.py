@@ -1,11 +1,19 @@
 import streamlit as st
+import queue
 import asyncio
+import threading
 from pathlib import Path
 import sys
 
+# uvloop's faster event loop is used when installed (it is not available on Windows)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Add the parent directory to Python path so we can import our scanner
 sys.path.append(str(Path(__file__).parent.parent))
-from scanner.cerebras_scanner import CodeScanner
+from scanner.cerebras_scanner import CodeScanner, SUPPORTED_CATEGORIES
 
 st.set_page_config(
     page_title="AI-Powered Python Security Scanner",
@@ -13,11 +21,36 @@ st.set_page_config(
     layout="wide"
 )
 
+# Scanner category key of each category offered in the UI
+_CATEGORY_MAP = {
+    "SQL Injection": "sql_injection",
+    "Authentication": "auth",
+    "Input Validation": "input_validation",
+    "Cryptographic Issues": "cryptographic_issues"
+}
+# Categories offered for selection: only those the scanner has a prompt for
+_AVAILABLE_CATEGORIES = [category for category, key in _CATEGORY_MAP.items() if key in SUPPORTED_CATEGORIES]
+
+# Seconds to wait for a stream update before checking that the streams are still running
+UPDATE_POLL_SECONDS = 1.0
+
 # Initialize the scanner
 @st.cache_resource
 def get_scanner():
     return CodeScanner()
 
+# One event loop for the whole app, running on a background thread, so clicks do not
+# each create and tear down a loop and the scanner's client stays bound to a single loop
+@st.cache_resource
+def get_loop():
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+async def gather(*coros):
+    """Run coroutines concurrently on the running loop."""
+    return await asyncio.gather(*coros)
+
 def main():
     st.title("AI-Powered Python Security Scanner")
     st.markdown("""
@@ -32,7 +65,7 @@ def main():
     # Analysis options
     analysis_type = st.multiselect(
         "Select analysis categories:",
-        ["SQL Injection", "Authentication", "Input Validation", "Cryptographic Issues"],
+        _AVAILABLE_CATEGORIES,
         default=["SQL Injection", "Authentication"]
     )
     
@@ -40,42 +73,94 @@ def main():
         if not code:
             st.error("Please enter some code to analyze.")
             return
-            
+        
+        
         scanner = get_scanner()
         
         # Show a spinner while analyzing
         with st.spinner("Analyzing code..."):
-            # Create tasks for each selected category
-            tasks = []
+            # One output area per category, filled in as the response streams in
+            category_keys = {category: _CATEGORY_MAP[category] for category in analysis_type}
+            sections = {}
+            placeholders = {}
             for category in analysis_type:
-                category_key = category.lower().replace(" ", "_")
-                tasks.append(scanner.analyze_code(code, category_key))
+                sections[category] = st.container()
+                sections[category].subheader(f"{category} Analysis")
+                placeholders[category] = sections[category].empty()
+            
+            # Streams run on the app's event loop; Streamlit elements must be updated from
+            # this thread, so the pieces are handed over through a queue
+            updates = queue.Queue()
+            
+            async def pump(category):
+                # Every stream ends with None or its exception, even when cancelled, so the
+                # loop below never waits for a category that will not report
+                item = None
+                try:
+                    async for text in scanner.analyze_code_stream(code, category_keys[category]):
+                        updates.put((category, text))
+                except Exception as e:
+                    item = e
+                except BaseException as e:
+                    item = e
+                    raise
+                finally:
+                    updates.put((category, item))
             
             # Run all analysis tasks concurrently
             try:
-                results = asyncio.run(asyncio.gather(*tasks))
+                future = asyncio.run_coroutine_threadsafe(
+                    gather(*(pump(category) for category in analysis_type)), get_loop()
+                )
                 
-                # Display results
-                for category, result in zip(analysis_type, results):
-                    st.subheader(f"{category} Analysis")
-                    
-                    if "error" in result:
-                        st.error(f"Error during analysis: {result['error']}")
+                # Text streamed so far per category, extended with each piece as it arrives
+                streamed = {category: "" for category in analysis_type}
+                remaining = len(analysis_type)
+                while remaining:
+                    try:
+                        category, item = updates.get(timeout=UPDATE_POLL_SECONDS)
+                    except queue.Empty:
+                        # The streams never started (or the loop died); surface why
+                        if future.done():
+                            future.result()
+                            break
                         continue
+                    if isinstance(item, BaseException):
+                        remaining -= 1
+                        placeholders[category].error(f"Error during analysis: {str(item)}")
+                    elif item is None:
+                        remaining -= 1
+                        result = scanner.finalize_stream(
+                            code, category_keys[category], streamed[category]
+                        )
+                        if "error" in result:
+                            placeholders[category].error(f"Error during analysis: {result['error']}")
+                            continue
+                        if result.get("skipped"):
+                            placeholders[category].empty()
+                            sections[category].info("Not analyzed: no code relevant to this category was found.")
+                            continue
+                        if not result.get("issues"):
+                            placeholders[category].empty()
+                            sections[category].success("No issues found in this category.")
+                            continue
                         
-                    if not result.get("issues"):
-                        st.success("No issues found in this category.")
-                    else:
+                        # Replace the streamed JSON with the parsed issues
+                        placeholders[category].empty()
                         for issue in result["issues"]:
-                            st.warning(
+                            sections[category].warning(
                                 f"""
                                 **Issue Found:**
-                                {issue.get('description', 'No description available')}
+                                {issue.get('where', 'Unknown location')}: {issue.get('why', 'No description available')}
                                 
                                 **Fix:**
                                 {issue.get('fix', 'No fix suggestion available')}
                                 """
                             )
+                    else:
+                        streamed[category] += item
+                        placeholders[category].markdown(streamed[category])
+                future.result()
                             
             except Exception as e:
                 st.error(f"An error occurred during analysis: {str(e)}")